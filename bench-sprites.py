@@ -0,0 +1,257 @@
+"""
+Benchmarks for the procedural sprite generator
+===============================================
+Times the pieces of generate-sprites.py that dominate a run:
+  - Primitives: px / rect / ellipse, at native and scaled-up canvas sizes
+  - Every draw function, per frame, for each entity animation
+  - PNG encoding (encode_png) and encoding + file I/O (save_frame / save_tile)
+  - Single-frame requests through the spritegen API, cold and cached
+  - The contact sheet, at the real sprite count and scaled up (also streamed,
+    rendering rows on demand)
+  - Animated previews (one batch quantization, every animation + combined)
+  - The full main(), at real size and at scaled-up sprite counts / resolutions
+
+Results are written as JSON (seconds per operation, best of several repeats)
+and compared against a stored baseline; any benchmark slower than the baseline
+by more than the tolerance fails the run (exit code 1). Baselines are
+per-machine, so none is committed: record one on the machine that gates
+(--save-baseline) and keep it there. When gating (--require-baseline, implied
+when the CI environment variable is set) a missing baseline fails the run
+instead of passing unchecked.
+
+Usage:
+  python bench-sprites.py                    # run + compare to baseline if present
+  python bench-sprites.py --save-baseline    # record this machine's baseline
+  python bench-sprites.py --filter draw/ --tolerance 0.5
+  python bench-sprites.py --require-baseline  # gate: no baseline is a failure
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import spritegen
+
+ROOT = Path(__file__).resolve().parent
+RESULTS_PATH = Path("sprites-bench.json")
+BASELINE_PATH = ROOT / "sprites-bench-baseline.json"
+
+
+def measure(fn, min_time: float, repeat: int) -> float:
+    """Best-of-`repeat` seconds per call, calibrating the call count to `min_time`."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+@contextlib.contextmanager
+def scratch_dir():
+    """Run in a throwaway working directory, with the generator's output muted."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield Path(tmp)
+        finally:
+            os.chdir(cwd)
+
+
+@contextlib.contextmanager
+def scaled_entities(gen, count: int = 1, res: int = 1):
+    """
+    Temporarily multiply every animation's frame count and every canvas size.
+    Tiles keep their size — the tileset grid is fixed at TILE_SIZE.
+    """
+    original = gen.ENTITIES
+    gen.ENTITIES = {
+        entity: {
+            **spec,
+            "size": spec["size"] if entity == "tiles" else (spec["size"][0] * res, spec["size"][1] * res),
+            "anims": {anim: n * count for anim, n in spec["anims"].items()},
+        }
+        for entity, spec in original.items()
+    }
+    try:
+        yield
+    finally:
+        gen.ENTITIES = original
+
+
+def benchmarks(gen):
+    """Yield (name, fn) pairs; each fn is one timed operation."""
+    # Primitives on a native-size and an 8× canvas (shapes scale with it)
+    for scale in (1, 8):
+        canvas = gen.Canvas(16 * scale, 32 * scale)
+        color = gen.PAL["shirt"]
+        yield f"primitive/px@{scale}x", lambda c=canvas: gen.px(c, 5, 9, color)
+        yield f"primitive/rect@{scale}x", lambda c=canvas, s=scale: gen.rect(c, 2 * s, 3 * s, 8 * s, 6 * s, color)
+        yield f"primitive/ellipse@{scale}x", lambda c=canvas, s=scale: gen.ellipse(c, 2 * s, 6 * s, 12 * s, 8 * s, color)
+
+    # Draw functions, per frame
+    for entity, spec in gen.ENTITIES.items():
+        for anim, frame_count in spec["anims"].items():
+            def draw_frames(entity=entity, anim=anim, frame_count=frame_count):
+                for f in range(frame_count):
+                    gen.render_frame(entity, anim, f)
+            yield f"draw/{entity}:{anim}", draw_frames, frame_count
+
+    # Encoding (in memory) and encoding + I/O, native and 8× upscaled
+    frame = gen.render_frame("player", "run", 2)
+    big = frame.resize((frame.width * 8, frame.height * 8), 0)
+    tile = gen.render_frame("tiles", "grass_top", 0)
+    yield "encode/frame@1x", lambda: gen.encode_png(frame)
+    yield "encode/frame@8x", lambda: gen.encode_png(big)
+    yield "encode/frame-indexed@1x", lambda: gen.encode_png(frame, {"indexed": True})
+    yield "save/save_frame", lambda: gen.save_frame("player", "run", 2, frame)
+    yield "save/save_tile", lambda: gen.save_tile("tiles", "grass_top", tile)
+
+    # Library API: one frame on demand (render + upscale + encode), then from the LRU cache
+    def api_cold():
+        spritegen.clear_cache()
+        spritegen.render_png("player", "run", 2, scale=4)
+    yield "api/render_png@4x-cold", api_cold
+    yield "api/render_png@4x-cached", lambda: spritegen.render_png("player", "run", 2, scale=4)
+
+    # Contact sheet at the real sprite count and with 10× the rows
+    all_sprites = gen.render_all(gen.frame_jobs())[0]
+    many = {
+        f"{entity}{i}": anims for i in range(10) for entity, anims in all_sprites.items()
+    }
+    yield "contact_sheet@1x", lambda: gen.generate_contact_sheet(all_sprites, force=True)
+    yield "contact_sheet@10x-count", lambda: gen.generate_contact_sheet(many, force=True)
+
+    def sheet_streamed(count=10):
+        with scaled_entities(gen, count):
+            gen.generate_contact_sheet(gen.render_sheet_rows(), force=True)
+    yield "contact_sheet@10x-streamed", sheet_streamed
+    yield "previews/gif", lambda: gen.generate_previews(all_sprites, "gif")
+
+    # Full runs: real size, 4× the frames, 4× the resolution
+    yield "main@1x", lambda: gen.main(["--force"])
+
+    def main_scaled(count=1, res=1):
+        with scaled_entities(gen, count, res):
+            gen.main(["--force"])
+    yield "main@4x-count", lambda: main_scaled(count=4)
+    yield "main@4x-res", lambda: main_scaled(res=4)
+
+
+def run(gen, name_filter: str, min_time: float, repeat: int) -> dict:
+    results = {}
+    with scratch_dir():
+        for bench in benchmarks(gen):
+            name, fn = bench[0], bench[1]
+            per_op = bench[2] if len(bench) > 2 else 1
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = measure(fn, min_time, repeat) / per_op
+            print(f"  {name:<32} {format_time(results[name]):>10}", file=sys.stderr)
+    return results
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Print current vs baseline; return the names that regressed past `tolerance`."""
+    regressions = []
+    print()
+    print(f"  {'benchmark':<32} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = "  ❌ REGRESSION"
+        print(f"  {name:<32} {format_time(baseline[name]):>10} {format_time(seconds):>10} "
+              f"{ratio:>6.2f}×{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generate-sprites.py")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH, help="results JSON path")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument(
+        "--require-baseline", action="store_true", default=bool(os.environ.get("CI")),
+        help="fail (exit code 1) when there is no baseline to compare with "
+             "(default: on when the CI environment variable is set)",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="allowed slowdown vs baseline before failing (0.25 = 25%% slower)",
+    )
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timing sample")
+    parser.add_argument("--repeat", type=int, default=5, help="timing samples per benchmark (best kept)")
+    args = parser.parse_args(argv)
+
+    print("⏱️  Benchmarking generate-sprites.py...", file=sys.stderr)
+    gen = spritegen.generator()
+    results = run(gen, args.filter, args.min_time, args.repeat)
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": gen.np.__version__,
+            "pillow": gen.Image.__version__,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2) + "\n"
+    args.output.write_text(text)
+    print(f"\n  Results: {args.output}", file=sys.stderr)
+
+    if args.save_baseline:
+        args.baseline.write_text(text)
+        print(f"  Baseline saved: {args.baseline}", file=sys.stderr)
+        return 0
+    if not args.baseline.exists():
+        if args.require_baseline:
+            print(f"\n  ❌ No baseline at {args.baseline}, so nothing was checked — record one on "
+                  f"this machine with --save-baseline", file=sys.stderr)
+            return 1
+        print(f"\n  ⚠️  No baseline at {args.baseline}: results were NOT checked for regressions "
+              f"— run with --save-baseline to create one.", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n  ❌ {len(regressions)} benchmark(s) regressed more than "
+              f"{args.tolerance:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    print(f"\n  ✅ No regressions beyond {args.tolerance:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 """
 Procedural Sprite Generator for Nick's Platformer
 ===================================================
-100% procedural Python + Pillow — no external art assets, no AI.
+100% procedural Python + Pillow + NumPy — no external art assets, no AI.
 Every pixel is placed by code.
 
 Generates all game sprites at native resolution:
@@ -13,17 +13,55 @@ Generates all game sprites at native resolution:
   - Platform tiles (16×16): wood_left, wood_mid, wood_right
   - Background elements (16×16): cloud_left, cloud_right, bush
 
+Entities, animations, frame counts and per-frame parameters: sprites.json
+
 Output: assets/sprites/{entity}/{animation}_{frame}.png
 Also: sprites-review.png contact sheet in repo root
+      (--preview: sprites-preview/{entity}_{animation}.gif + all.gif)
 
 Usage:
-  pip install Pillow
+  pip install Pillow numpy
   python generate-sprites.py
+  python generate-sprites.py --jobs 0     # render across all CPU cores
+  python generate-sprites.py --atlas entity --atlas-pot   # + packed atlases
+  python generate-sprites.py --png indexed --png-level 9  # smaller web payload
+  python generate-sprites.py --profile trace.json         # timing report + trace
+  python generate-sprites.py --dedupe --wire             # alias duplicates, rewire scenes
+  python generate-sprites.py --trim --wire               # crop empty borders, rewire scenes
+  python generate-sprites.py --collision                 # traced collision shapes in scenes
+  python generate-sprites.py --import-sidecars           # + Godot .import files, list re-imports
+  python generate-sprites.py --variants                  # + palette-swap skins
+  python generate-sprites.py --tile-variants 4           # + 4 seeded variants per tile
+  python generate-sprites.py --scales 2,4 --mips         # + HD sets and mip chains
+  python generate-sprites.py --watch                     # regenerate on save
+  python generate-sprites.py --check                     # compare pixels with sprites-golden.json
+  python generate-sprites.py --report                    # asset sizes vs sprites-budget.json
+  python generate-sprites.py --only player:run,coin      # just these frames
+  python generate-sprites.py --preview gif               # + animated previews
+
+As a library (single frames on demand, no batch run): see spritegen.py.
 """
 
+import argparse
+import contextlib
+import hashlib
+import inspect
+import io
+import json
 import math
 import os
+import re
+import struct
+import sys
+import time
+import tracemalloc
+import types
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial, wraps
 from pathlib import Path
+
+import numpy as np
 from PIL import Image, ImageDraw
 
 # ─── Palette ────────────────────────────────────────────────────────
@@ -82,55 +120,164 @@ PAL = {
 
 OUT_DIR = Path("assets/sprites")
 REVIEW_PATH = Path("sprites-review.png")
+MANIFEST_PATH = OUT_DIR / ".manifest.json"
+ATLAS_DIR = OUT_DIR / "atlases"
+TILE_ATLAS_PATH = OUT_DIR / "tiles" / "atlas.png"
+TILESET_PATH = Path("assets/tileset.tres")
+ALIASES_PATH = OUT_DIR / "aliases.json"
+TRIM_PATH = OUT_DIR / "trim.json"
+SCENES_DIR = Path("scenes")
+
+
+class Canvas:
+    """
+    RGBA drawing surface backed by an (H, W, 4) uint8 array.
+
+    Primitives become slice / mask assignments on `data`; the array is turned
+    into a PIL Image once per frame via `to_image()`. Pixels are replaced, not
+    blended — same semantics as putpixel / ImageDraw fills on RGBA images;
+    translucent parts are drawn on their own canvas and layered with composite().
+    """
+
+    def __init__(self, width: int, height: int, color: tuple = PAL["transparent"]):
+        self.width = width
+        self.height = height
+        self.data = np.empty((height, width, 4), dtype=np.uint8)
+        self.data[:, :] = rgba(color)
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(self.data)
+
 
+def rgba(color: tuple) -> tuple:
+    """Normalize an RGB or RGBA tuple to RGBA (RGB means fully opaque)."""
+    return color if len(color) == 4 else (*color, 255)
 
-def px(img: Image.Image, x: int, y: int, color: tuple):
+
+@lru_cache(maxsize=None)
+def ellipse_mask(w: int, h: int) -> np.ndarray:
+    """
+    Boolean (h, w) mask of a filled ellipse inscribed in a w×h box.
+    Rasterized once per size by Pillow so the shape matches ImageDraw exactly.
+    """
+    mask = Image.new("L", (w, h), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, w - 1, h - 1], fill=255)
+    return np.asarray(mask) > 0
+
+
+def px(img: Canvas, x: int, y: int, color: tuple):
     """Draw a single pixel, bounds-checked."""
     if 0 <= x < img.width and 0 <= y < img.height:
-        img.putpixel((x, y), color)
+        img.data[y, x] = rgba(color)
 
 
-def rect(img: Image.Image, x: int, y: int, w: int, h: int, color: tuple):
+def rect(img: Canvas, x: int, y: int, w: int, h: int, color: tuple):
     """Draw a filled rectangle."""
     if w <= 0 or h <= 0:
         return
-    draw = ImageDraw.Draw(img)
-    draw.rectangle([x, y, x + w - 1, y + h - 1], fill=color)
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, img.width), min(y + h, img.height)
+    if x0 < x1 and y0 < y1:
+        img.data[y0:y1, x0:x1] = rgba(color)
 
 
-def ellipse(img: Image.Image, x: int, y: int, w: int, h: int, color: tuple):
+def ellipse(img: Canvas, x: int, y: int, w: int, h: int, color: tuple):
     """Draw a filled ellipse."""
-    draw = ImageDraw.Draw(img)
-    draw.ellipse([x, y, x + w - 1, y + h - 1], fill=color)
+    mask = ellipse_mask(w, h)
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, img.width), min(y + h, img.height)
+    if x0 < x1 and y0 < y1:
+        clip = mask[y0 - y:y1 - y, x0 - x:x1 - x]
+        img.data[y0:y1, x0:x1][clip] = rgba(color)
 
 
-# ─── Player (16×32) ────────────────────────────────────────────────
-def draw_player_body(img: Image.Image, frame: int, anim: str):
-    """Draw the player character body (no face yet)."""
-    # Animation offsets
-    bounce = 0
-    lean = 0
-    leg_phase = 0
-    arm_swing = 0
-    squash_y = 0
-
-    if anim == "idle":
-        bounce = [0, -1, 0, 0][frame % 4]
-    elif anim == "run":
-        bounce = [0, -1, -1, 0, 1, 0][frame % 6]
-        leg_phase = frame % 6
-        arm_swing = [0, 1, 2, 1, 0, -1][frame % 6]
-        lean = 1
-    elif anim == "jump":
-        bounce = [-2, -1][frame % 2]
-        squash_y = -1
-    elif anim == "fall":
-        bounce = [1, 2][frame % 2]
-        squash_y = 1
-    elif anim == "hurt":
-        bounce = [0, -1, 0][frame % 3]
-        lean = [-1, 1, 0][frame % 3]
+# ─── Static layers ─────────────────────────────────────────────────
+# Parts of a frame that never move (goal pole, slime ground shadow, tile base
+# bands) are drawn once and memoized per canvas size, parameters and palette;
+# each frame starts from a copy of the cached layer and only draws what moves.
+LAYER_CACHE = {}
+
 
+def static_layer(fn):
+    """
+    Memoize a frame's bottom layer. The decorated function draws onto a blank
+    canvas; calling it copies the cached pixels over the whole target, so it
+    must be the first thing drawn on a fresh, transparent canvas.
+    """
+    @wraps(fn)
+    def draw_layer(img: Canvas, *params):
+        key = (fn.__qualname__, img.width, img.height, params, tuple(PAL.values()))
+        layer = LAYER_CACHE.get(key)
+        if layer is None:
+            canvas = Canvas(img.width, img.height)
+            fn(canvas, *params)
+            layer = LAYER_CACHE[key] = canvas.data
+        img.data[...] = layer
+    return draw_layer
+
+
+# ─── Compositing ───────────────────────────────────────────────────
+# Layers are RGBA uint8 arrays blended bottom to top in premultiplied alpha
+# (W3C compositing: source-over with a separable blend mode), so translucent
+# shapes stack correctly instead of replacing what's below. Leading dimensions
+# broadcast: one (H, W, 4) layer blends into an (N, H, W, 4) batch of frames
+# in a single pass.
+BLEND_MODES = {  # premultiplied (src color, src alpha, dst color, dst alpha) → Sa·Da·B(Cs, Cd)
+    "normal": lambda sc, sa, dc, da: sc * da,
+    "multiply": lambda sc, sa, dc, da: sc * dc,
+    "add": lambda sc, sa, dc, da: np.minimum(sc * da + dc * sa, sa * da),
+}
+
+
+def premultiply(pixels: np.ndarray) -> np.ndarray:
+    """RGBA uint8 → float32 in [0, 1] with color multiplied by alpha."""
+    layer = pixels.astype(np.float32) / 255
+    layer[..., :3] *= layer[..., 3:]
+    return layer
+
+
+def unpremultiply(layer: np.ndarray) -> np.ndarray:
+    """Inverse of premultiply(), rounded back to RGBA uint8 (fully transparent → 0, 0, 0, 0)."""
+    alpha = layer[..., 3:]
+    color = np.divide(layer[..., :3], alpha, out=np.zeros_like(layer[..., :3]), where=alpha > 0)
+    return (np.concatenate([color, alpha], axis=-1).clip(0, 1) * 255 + 0.5).astype(np.uint8)
+
+
+def composite(layers: list) -> np.ndarray:
+    """
+    Blend [(pixels, mode), ...] bottom to top (mode from BLEND_MODES) and
+    return RGBA uint8 in the broadcast shape of all layers.
+    """
+    shape = np.broadcast_shapes(*(pixels.shape for pixels, _ in layers))
+    straight = np.zeros(shape, dtype=np.uint8)  # exact result while no layer has blended
+    out = None
+    for pixels, mode in layers:
+        alpha = pixels[..., 3:]
+        if mode == "normal" and ((alpha == 0) | (alpha == 255)).all():
+            # Opaque source pixels replace what's below, transparent ones leave it
+            opaque = alpha == 255
+            if out is None:
+                straight = np.where(opaque, pixels, straight)
+            else:
+                out = np.where(opaque, premultiply(pixels), out)
+            continue
+        if out is None:
+            out = premultiply(straight)
+        src = premultiply(pixels)
+        sc, sa, dc, da = src[..., :3], src[..., 3:], out[..., :3], out[..., 3:]
+        color = sc * (1 - da) + dc * (1 - sa) + BLEND_MODES[mode](sc, sa, dc, da)
+        out = np.concatenate([color, sa + da * (1 - sa)], axis=-1)
+    return straight if out is None else unpremultiply(out)
+
+
+# ─── Player (16×32) ────────────────────────────────────────────────
+def draw_player_body(img: Canvas, frame: int, anim: str, bounce: int = 0, lean: int = 0,
+                     leg_phase: int = 0, arm_swing: int = 0, squash_y: int = 0,
+                     arms: str = "rest", legs: str = "stand", eyes: str = "open"):
+    """
+    Draw the player character body (no face yet). The offsets and the arm /
+    leg / eye poses come per frame from sprites.json.
+    """
     by = 8 + bounce  # base y for head top
 
     # Hair (top of head)
@@ -144,8 +291,8 @@ def draw_player_body(img: Image.Image, frame: int, anim: str):
     rect(img, 12 + lean, by + 4, 1, 3, PAL["skin_shadow"])  # right cheek shadow
 
     # Eyes
-    eye_color = PAL["eye_hurt"] if anim == "hurt" else PAL["eye"]
-    if anim == "hurt":
+    eye_color = PAL["eye_hurt"] if eyes == "x" else PAL["eye"]
+    if eyes == "x":
         # X eyes
         px(img, 6 + lean, by + 5, eye_color)
         px(img, 8 + lean, by + 5, eye_color)
@@ -172,7 +319,7 @@ def draw_player_body(img: Image.Image, frame: int, anim: str):
 
     # Arms
     arm_y = torso_y + 1
-    if anim == "run":
+    if arms == "swing":
         # Swinging arms
         rect(img, 2 + lean, arm_y + arm_swing, 2, 5, PAL["shirt"])
         rect(img, 12 + lean, arm_y - arm_swing, 2, 5, PAL["shirt"])
@@ -181,7 +328,7 @@ def draw_player_body(img: Image.Image, frame: int, anim: str):
         px(img, 3 + lean, arm_y + arm_swing + 5, PAL["skin"])
         px(img, 12 + lean, arm_y - arm_swing + 5, PAL["skin"])
         px(img, 13 + lean, arm_y - arm_swing + 5, PAL["skin"])
-    elif anim == "jump":
+    elif arms == "up":
         # Arms up
         rect(img, 2, arm_y - 2, 2, 4, PAL["shirt"])
         rect(img, 12, arm_y - 2, 2, 4, PAL["shirt"])
@@ -189,7 +336,7 @@ def draw_player_body(img: Image.Image, frame: int, anim: str):
         px(img, 3, arm_y - 3, PAL["skin"])
         px(img, 12, arm_y - 3, PAL["skin"])
         px(img, 13, arm_y - 3, PAL["skin"])
-    elif anim == "hurt":
+    elif arms == "flail":
         # Arms flail
         rect(img, 1 + lean, arm_y - 1, 2, 4, PAL["shirt"])
         rect(img, 13 + lean, arm_y + 1, 2, 4, PAL["shirt"])
@@ -209,7 +356,7 @@ def draw_player_body(img: Image.Image, frame: int, anim: str):
 
     # Legs
     leg_y = pants_y + 4
-    if anim == "run":
+    if legs == "stride":
         # Alternating leg positions
         offsets = [
             (0, 0, 3, -1),   # left_x, right_x, left_extend, right_extend
@@ -226,13 +373,13 @@ def draw_player_body(img: Image.Image, frame: int, anim: str):
         # Right leg
         rect(img, 9 + lean + lo[1], leg_y, 3, 4 + lo[3], PAL["pants"])
         rect(img, 9 + lean + lo[1], leg_y + 3 + lo[3], 4, 2, PAL["shoes"])
-    elif anim == "jump":
+    elif legs == "tucked":
         # Legs tucked
         rect(img, 4, leg_y - 1, 3, 3, PAL["pants"])
         rect(img, 9, leg_y - 1, 3, 3, PAL["pants"])
         rect(img, 4, leg_y + 2, 4, 2, PAL["shoes"])
         rect(img, 9, leg_y + 2, 4, 2, PAL["shoes"])
-    elif anim == "fall":
+    elif legs == "dangle":
         # Legs dangling apart
         rect(img, 3, leg_y, 3, 5, PAL["pants"])
         rect(img, 10, leg_y, 3, 5, PAL["pants"])
@@ -246,44 +393,25 @@ def draw_player_body(img: Image.Image, frame: int, anim: str):
         rect(img, 9 + lean, leg_y + 4, 4, 2, PAL["shoes"])
 
 
-def generate_player():
-    """Generate all player animation frames."""
-    anims = {
-        "idle": 4,
-        "run": 6,
-        "jump": 2,
-        "fall": 2,
-        "hurt": 3,
-    }
-    frames = {}
-    for anim_name, frame_count in anims.items():
-        frames[anim_name] = []
-        for f in range(frame_count):
-            img = Image.new("RGBA", (16, 32), PAL["transparent"])
-            draw_player_body(img, f, anim_name)
-            frames[anim_name].append(img)
-            save_frame("player", anim_name, f, img)
-    return frames
-
-
 # ─── Slime (16×16) ─────────────────────────────────────────────────
-def draw_slime(img: Image.Image, frame: int, anim: str):
-    """Draw the slime enemy."""
-    if anim == "walk":
-        # Hop cycle: squish down, normal, stretch up, normal
-        squash = [0, -1, -2, -1][frame % 4]
-        stretch = [0, 1, 2, 1][frame % 4]
-        bounce = [0, 0, -2, -1][frame % 4]
-    else:  # squish (death)
-        squash = [3, 5][frame % 2]
-        stretch = [-2, -4][frame % 2]
-        bounce = [0, 2][frame % 2]
+@static_layer
+def slime_shadow(img: Canvas):
+    """Shadow on the ground — the same in every slime frame."""
+    ellipse(img, 3, 13, 10, 3, (0, 0, 0, 40))
 
+
+def draw_slime(img: Canvas, frame: int, anim: str, squash: int = 0, stretch: int = 0,
+               bounce: int = 0, eyes: bool = True):
+    """
+    Draw the slime enemy. sprites.json gives the hop cycle (squish down,
+    normal, stretch up, normal) and the flattening death frames.
+    """
     base_y = 10 + bounce
     body_h = 6 - squash + stretch
 
-    # Shadow on ground
-    ellipse(img, 3, 13, 10, 3, (0, 0, 0, 40))
+    # Translucent ground shadow, cached. Every body color is opaque, so drawing
+    # the body straight over it is the same as compositing it on top
+    slime_shadow(img)
 
     # Body (blobby shape)
     # Main mass
@@ -300,8 +428,8 @@ def draw_slime(img: Image.Image, frame: int, anim: str):
     rect(img, 3, base_y - 2, 10, 2, PAL["slime_shadow"])
     rect(img, 4, base_y, 8, 1, PAL["slime_dark"])
 
-    # Eyes (only if not squished dead)
-    if anim != "squish" or frame == 0:
+    # Eyes (gone once squished dead)
+    if eyes:
         eye_y = body_top + max(body_h // 3, 1)
         # Left eye
         rect(img, 5, eye_y, 2, 2, PAL["slime_eye"])
@@ -311,27 +439,16 @@ def draw_slime(img: Image.Image, frame: int, anim: str):
         px(img, 9, eye_y + 1, PAL["slime_pupil"])
 
 
-def generate_slime():
-    """Generate all slime animation frames."""
-    anims = {"walk": 4, "squish": 2}
-    frames = {}
-    for anim_name, frame_count in anims.items():
-        frames[anim_name] = []
-        for f in range(frame_count):
-            img = Image.new("RGBA", (16, 16), PAL["transparent"])
-            draw_slime(img, f, anim_name)
-            frames[anim_name].append(img)
-            save_frame("slime", anim_name, f, img)
-    return frames
-
-
 # ─── Coin (16×16) ──────────────────────────────────────────────────
-def draw_coin(img: Image.Image, frame: int, anim: str):
-    """Draw a spinning coin."""
-    if anim == "idle":
-        # Pseudo-3D rotation — width changes over 6 frames
-        widths = [8, 7, 4, 2, 4, 7]
-        w = widths[frame % 6]
+def draw_coin(img: Canvas, frame: int, anim: str, width: int = 8, burst: bool = False,
+              rise: int = 0, size: int = 8):
+    """
+    Draw a spinning coin `width` pixels wide, or with `burst` its collect
+    frames (shrinking to `size`, rising by `rise`, sparkling).
+    """
+    if not burst:
+        # Pseudo-3D rotation — the width changes frame by frame
+        w = width
         cx = 8
         x0 = cx - w // 2
         # Coin body
@@ -344,41 +461,26 @@ def draw_coin(img: Image.Image, frame: int, anim: str):
         # Shine
         if w > 4:
             px(img, x0 + 1, 5, PAL["white"])
-    elif anim == "collect":
+    else:
         # Shrink + rise + sparkle
-        rise = frame * 2
-        size = max(8 - frame * 2, 2)
         cx, cy = 8, 8 - rise
         x0 = cx - size // 2
         y0 = cy - size // 2
         ellipse(img, x0, y0, size, size, PAL["gold_light"])
-        # Sparkle particles
+        # Sparkle particles, a layer over the coin
+        sparkles = Canvas(img.width, img.height)
         for angle_offset in range(4):
             a = (frame * 0.8 + angle_offset * 1.57)
             sx = int(cx + math.cos(a) * (4 + frame))
             sy = int(cy + math.sin(a) * (4 + frame))
-            px(img, sx, sy, PAL["gold"])
-
-
-def generate_coin():
-    """Generate all coin animation frames."""
-    anims = {"idle": 6, "collect": 4}
-    frames = {}
-    for anim_name, frame_count in anims.items():
-        frames[anim_name] = []
-        for f in range(frame_count):
-            img = Image.new("RGBA", (16, 16), PAL["transparent"])
-            draw_coin(img, f, anim_name)
-            frames[anim_name].append(img)
-            save_frame("coin", anim_name, f, img)
-    return frames
+            px(sparkles, sx, sy, PAL["gold"])
+        img.data[...] = composite([(img.data, "normal"), (sparkles.data, "normal")])
 
 
 # ─── Goal Flag (16×32) ─────────────────────────────────────────────
-def draw_goal(img: Image.Image, frame: int, anim: str):
-    """Draw a flag on a pole."""
-    wave = frame % 2
-
+@static_layer
+def goal_pole(img: Canvas):
+    """Pole, top ball and stone base — everything but the flag."""
     # Pole
     rect(img, 7, 2, 2, 28, PAL["pole"])
     rect(img, 7, 2, 1, 28, PAL["pole_shadow"])
@@ -387,6 +489,16 @@ def draw_goal(img: Image.Image, frame: int, anim: str):
     rect(img, 6, 1, 4, 2, PAL["gold"])
     px(img, 7, 0, PAL["gold_light"])
 
+    # Pole base
+    rect(img, 5, 28, 6, 2, PAL["stone"])
+    rect(img, 6, 30, 4, 2, PAL["stone_shadow"])
+
+
+def draw_goal(img: Canvas, frame: int, anim: str, wave: int = 0):
+    """Draw a flag on a pole; `wave` shifts the flag's ripple by a row."""
+    # The flag never overlaps the pole, ball or base, so they can go first
+    goal_pole(img)
+
     # Flag (waves)
     flag_y = 4
     for row in range(8):
@@ -395,255 +507,3232 @@ def draw_goal(img: Image.Image, frame: int, anim: str):
         color = PAL["flag_red"] if (row + wave) % 4 < 2 else PAL["flag_red_shadow"]
         rect(img, 9 + wave_offset, flag_y + row, flag_w, 1, color)
 
-    # Pole base
-    rect(img, 5, 28, 6, 2, PAL["stone"])
-    rect(img, 6, 30, 4, 2, PAL["stone_shadow"])
-
 
-def generate_goal():
-    """Generate goal flag frames."""
-    frames = {"idle": []}
-    for f in range(2):
-        img = Image.new("RGBA", (16, 32), PAL["transparent"])
-        draw_goal(img, f, "idle")
-        frames["idle"].append(img)
-        save_frame("goal", "idle", f, img)
-    return frames
+# ─── Tiles (16×16) ─────────────────────────────────────────────────
+# Single source of truth for the tileset: atlas cell order (row-major,
+# TILE_ATLAS_COLUMNS per row) and each tile's collision polygon — FROM_ALPHA
+# (traced from the tile's own pixels, see alpha_polygon), explicit points in
+# tile-centered pixels, or None for no collision. Drives tiles/atlas.png and
+# assets/tileset.tres.
+TILE_SIZE = 16
+TILE_ATLAS_COLUMNS = 16
+FROM_ALPHA = "alpha"
+TILES = {
+    "grass_top": FROM_ALPHA,
+    "dirt": FROM_ALPHA,
+    "grass_left": FROM_ALPHA,
+    "grass_right": FROM_ALPHA,
+    "wood_left": FROM_ALPHA,
+    "wood_mid": FROM_ALPHA,
+    "wood_right": FROM_ALPHA,
+}
 
 
-# ─── Tiles (16×16) ─────────────────────────────────────────────────
-def generate_tiles():
-    """Generate tileset pieces."""
-    tiles = {}
-
-    # Grass top
-    img = Image.new("RGBA", (16, 16), PAL["dirt"])
-    rect(img, 0, 0, 16, 4, PAL["grass"])
-    rect(img, 0, 0, 16, 2, PAL["grass_light"])
-    # Grass tufts on top edge
-    for x in [1, 4, 7, 11, 14]:
-        px(img, x, 0, PAL["grass_light"])
-    # Dirt texture
-    for pos in [(3, 7), (8, 9), (12, 6), (5, 12), (10, 14), (2, 10)]:
-        px(img, pos[0], pos[1], PAL["dirt_shadow"])
-    tiles["grass_top"] = img
-    save_tile("tiles", "grass_top", img)
-
-    # Dirt (solid fill)
-    img = Image.new("RGBA", (16, 16), PAL["dirt"])
+@static_layer
+def dirt_base(img: Canvas):
+    """Solid dirt fill under every ground tile."""
     rect(img, 0, 0, 16, 16, PAL["dirt"])
-    for pos in [(3, 3), (8, 5), (12, 2), (5, 8), (1, 12), (10, 10), (14, 7), (7, 14), (4, 1), (11, 13)]:
-        px(img, pos[0], pos[1], PAL["dirt_shadow"])
-    for pos in [(6, 4), (13, 9), (2, 7)]:
-        px(img, pos[0], pos[1], PAL["dirt_dark"])
-    tiles["dirt"] = img
-    save_tile("tiles", "dirt", img)
-
-    # Grass left edge
-    img = Image.new("RGBA", (16, 16), PAL["dirt"])
-    rect(img, 0, 0, 4, 16, PAL["grass_dark"])
-    rect(img, 0, 0, 2, 16, PAL["grass"])
-    for pos in [(6, 4), (10, 8), (8, 12), (12, 3)]:
-        px(img, pos[0], pos[1], PAL["dirt_shadow"])
-    tiles["grass_left"] = img
-    save_tile("tiles", "grass_left", img)
-
-    # Grass right edge
-    img = Image.new("RGBA", (16, 16), PAL["dirt"])
-    rect(img, 12, 0, 4, 16, PAL["grass_dark"])
-    rect(img, 14, 0, 2, 16, PAL["grass"])
-    for pos in [(3, 5), (6, 9), (8, 2), (4, 13)]:
-        px(img, pos[0], pos[1], PAL["dirt_shadow"])
-    tiles["grass_right"] = img
-    save_tile("tiles", "grass_right", img)
-
-    # Wood platform (left end)
-    img = Image.new("RGBA", (16, 16), PAL["wood"])
+
+
+@static_layer
+def wood_plank(img: Canvas):
+    """Wood fill with the top highlight and bottom shadow shared by all planks."""
+    rect(img, 0, 0, 16, 16, PAL["wood"])
     rect(img, 0, 0, 16, 2, PAL["wood_light"])  # top highlight
     rect(img, 0, 14, 16, 2, PAL["wood_shadow"])  # bottom shadow
-    rect(img, 0, 0, 2, 16, PAL["wood_shadow"])  # left edge
-    # Wood grain lines
-    for y in [5, 10]:
-        rect(img, 2, y, 14, 1, PAL["wood_shadow"])
-    tiles["wood_left"] = img
-    save_tile("tiles", "wood_left", img)
-
-    # Wood platform (middle)
-    img = Image.new("RGBA", (16, 16), PAL["wood"])
-    rect(img, 0, 0, 16, 2, PAL["wood_light"])
-    rect(img, 0, 14, 16, 2, PAL["wood_shadow"])
-    for y in [5, 10]:
-        rect(img, 0, y, 16, 1, PAL["wood_shadow"])
-    # Knot
-    px(img, 8, 7, PAL["wood_shadow"])
-    px(img, 9, 7, PAL["wood_shadow"])
-    px(img, 8, 8, PAL["wood_shadow"])
-    tiles["wood_mid"] = img
-    save_tile("tiles", "wood_mid", img)
-
-    # Wood platform (right end)
-    img = Image.new("RGBA", (16, 16), PAL["wood"])
-    rect(img, 0, 0, 16, 2, PAL["wood_light"])
-    rect(img, 0, 14, 16, 2, PAL["wood_shadow"])
-    rect(img, 14, 0, 2, 16, PAL["wood_shadow"])  # right edge
-    for y in [5, 10]:
-        rect(img, 0, y, 14, 1, PAL["wood_shadow"])
-    tiles["wood_right"] = img
-    save_tile("tiles", "wood_right", img)
-
-    return tiles
+
+
+def draw_shapes(img: Canvas, shapes: list):
+    """
+    Draw sprites.json shapes in order: ["rect" | "ellipse", x, y, w, h, PAL key]
+    or ["px", [[x, y], ...], PAL key].
+    """
+    for op, *args, color in shapes:
+        if op == "px":
+            for x, y in args[0]:
+                px(img, x, y, PAL[color])
+        elif op == "rect":
+            rect(img, *args, PAL[color])
+        elif op == "ellipse":
+            ellipse(img, *args, PAL[color])
+        else:
+            raise ValueError(f"unknown shape {op!r}")
+
+
+def draw_tile(img: Canvas, frame: int, anim: str, base: str = None, shapes: list = (),
+              detail_shapes: list = (), details: bool = True):
+    """
+    Draw a tileset piece: the shared `base` layer ("dirt" or "wood"), then its
+    shapes from sprites.json. details=False leaves out the speckles, tufts
+    and knots (the base --tile-variants scatters onto).
+    """
+    if base is not None:
+        {"dirt": dirt_base, "wood": wood_plank}[base](img)
+    draw_shapes(img, shapes)
+    if details:
+        draw_shapes(img, detail_shapes)
 
 
 # ─── Background elements (16×16) ───────────────────────────────────
-def generate_bg():
-    """Generate background decoration sprites."""
-    bgs = {}
-
-    # Cloud left half
-    img = Image.new("RGBA", (16, 16), PAL["transparent"])
-    ellipse(img, 2, 6, 12, 8, PAL["cloud"])
-    ellipse(img, 4, 3, 8, 6, PAL["cloud"])
-    rect(img, 12, 6, 4, 6, PAL["cloud"])  # extend right for seamless join
-    # Shadow
-    ellipse(img, 3, 9, 10, 5, PAL["cloud_shadow"])
-    bgs["cloud_left"] = img
-    save_tile("bg", "cloud_left", img)
-
-    # Cloud right half
-    img = Image.new("RGBA", (16, 16), PAL["transparent"])
-    rect(img, 0, 6, 4, 6, PAL["cloud"])  # extend left for seamless join
-    ellipse(img, 2, 6, 12, 8, PAL["cloud"])
-    ellipse(img, 5, 4, 8, 6, PAL["cloud"])
-    ellipse(img, 3, 9, 10, 5, PAL["cloud_shadow"])
-    bgs["cloud_right"] = img
-    save_tile("bg", "cloud_right", img)
-
-    # Bush
-    img = Image.new("RGBA", (16, 16), PAL["transparent"])
-    ellipse(img, 1, 6, 14, 10, PAL["bush_green"])
-    ellipse(img, 3, 4, 10, 8, PAL["bush_green"])
-    ellipse(img, 2, 3, 6, 6, PAL["bush_light"])
-    ellipse(img, 2, 10, 12, 6, PAL["bush_dark"])
-    bgs["bush"] = img
-    save_tile("bg", "bush", img)
-
-    return bgs
+def draw_bg(img: Canvas, frame: int, anim: str, shapes: list = ()):
+    """Draw a background decoration from its sprites.json shapes."""
+    draw_shapes(img, shapes)
+
+
+# ─── Entity table ──────────────────────────────────────────────────
+# Everything the generator renders, in output (and contact sheet) order, is
+# declared in sprites.json next to this file: label, canvas size, draw
+# function (by name) and, per animation, its frame count plus the parameters
+# passed to the draw function as keyword arguments — a list holds one value
+# per frame, anything else is the same for every frame. Adding frames or
+# animations, or retiming them, is a data edit. load_spec() compiles the file
+# once into ENTITIES, with every frame's arguments resolved, so rendering a
+# frame is a single list lookup. Draw functions never look at the animation
+# name; named poses (the player's arms / legs / eyes) are parameters that
+# pick a drawing branch, so reusing a pose is a data edit and a new one is code.
+# Tiles and background pieces ("single") are one-frame "animations" saved as
+# {name}.png, whose parameters are never per-frame: each is a list of shapes
+# (see draw_shapes). Tiles list the TILES names in order and aren't packed
+# (they already share tiles/atlas.png). "collision" names the animation
+# --collision traces.
+SPEC_PATH = Path(__file__).resolve().parent / "sprites.json"
+
+
+def load_spec(path: Path = SPEC_PATH) -> dict:
+    """
+    Compile the entity spec at `path` into the ENTITIES table: draw functions
+    resolved, sizes as tuples, anims as {anim: frame count} and params as
+    {anim: [draw keyword arguments per frame]}. Raises ValueError for an
+    unknown draw function, a per-frame list of the wrong length or tiles that
+    don't match TILES.
+    """
+    entities = {}
+    for entity, spec in json.loads(path.read_text()).items():
+        draw = globals().get(spec["draw"])
+        if not inspect.isfunction(draw) or not spec["draw"].startswith("draw_"):
+            raise ValueError(f"{path.name}: {entity} has no draw function {spec['draw']!r}")
+        anims, params = {}, {}
+        per_frame = not spec.get("single")
+        for anim, value in spec["anims"].items():
+            if isinstance(value, int):
+                anims[anim] = value
+                continue
+            args = {key: v for key, v in value.items() if key != "frames"}
+            count = anims[anim] = value.get("frames", 1)
+            for key, v in args.items():
+                if per_frame and isinstance(v, list) and len(v) != count:
+                    raise ValueError(f"{path.name}: {entity}:{anim} has {len(v)} {key} values "
+                                     f"for {count} frames")
+            params[anim] = [
+                {key: v[f] if per_frame and isinstance(v, list) else v for key, v in args.items()}
+                for f in range(count)
+            ]
+        entities[entity] = {
+            **spec, "size": tuple(spec["size"]), "draw": draw, "anims": anims, "params": params,
+        }
+    if "tiles" in entities and list(entities["tiles"]["anims"]) != list(TILES):
+        raise ValueError(f"{path.name}: tiles must list the TILES names in order")
+    return entities
+
+
+ENTITIES = load_spec()
+
+
+# ─── Profiling (--profile) ─────────────────────────────────────────
+# Off by default: stage() is a no-op and the primitives are unwrapped. With
+# --profile, every stage records wall time, CPU time and peak traced memory,
+# and px/rect/ellipse calls are counted per entity. Worker processes profile
+# themselves and ship their records back with each job's result.
+PROFILER = None
+
+
+class Profiler:
+    """Collects stage records and primitive call counts for one process."""
+
+    def __init__(self):
+        # (stage, entity, start, wall_s, self_wall_s, self_cpu_s, peak_bytes, pid)
+        self.events = []
+        self.calls = {}  # {(entity, primitive): count}
+        self.entity = None
+        self.stack = []  # open stages: [child_wall, child_cpu, peak_abs]
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """
+        Time a stage. Stages may nest: the summary uses each stage's own
+        (exclusive) time, and a child's memory peak counts toward its parent.
+        """
+        tracemalloc.reset_peak()
+        base_mem = tracemalloc.get_traced_memory()[0]
+        frame = [0.0, 0.0, 0]
+        self.stack.append(frame)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            self.stack.pop()
+            peak_abs = max(frame[2], tracemalloc.get_traced_memory()[1])
+            if self.stack:
+                parent = self.stack[-1]
+                parent[0] += wall
+                parent[1] += cpu
+                parent[2] = max(parent[2], peak_abs)
+            self.events.append((
+                name, self.entity, start, wall, wall - frame[0], cpu - frame[1],
+                peak_abs - base_mem, os.getpid(),
+            ))
+
+    def drain(self) -> tuple:
+        """Hand over (and forget) everything recorded so far — picklable."""
+        records = (self.events, self.calls)
+        self.events, self.calls = [], {}
+        return records
+
+    def merge(self, records: tuple):
+        events, calls = records
+        self.events.extend(events)
+        for key, count in calls.items():
+            self.calls[key] = self.calls.get(key, 0) + count
+
+
+def stage(name: str):
+    """Context manager timing a pipeline stage when profiling is on."""
+    return PROFILER.stage(name) if PROFILER else contextlib.nullcontext()
+
+
+def counted(fn):
+    @wraps(fn)
+    def wrapper(*args):
+        key = (PROFILER.entity, fn.__name__)
+        PROFILER.calls[key] = PROFILER.calls.get(key, 0) + 1
+        return fn(*args)
+    return wrapper
+
+
+def enable_profiling() -> Profiler:
+    """Turn profiling on for this process (idempotent)."""
+    global PROFILER, px, rect, ellipse
+    if PROFILER is None:
+        PROFILER = Profiler()
+        tracemalloc.start()
+        px, rect, ellipse = counted(px), counted(rect), counted(ellipse)
+    return PROFILER
+
+
+def profile_summary(profiler: Profiler) -> dict:
+    """
+    Aggregate stage records by (process, stage, entity) — exclusive wall/CPU
+    time, max peak memory — and primitive calls by entity. Stages run in pool
+    workers are kept apart from the main process's ("worker" vs "main"):
+    workers run concurrently, so their times only add up with each other.
+    """
+    stages = {}
+    workers = set()
+    for name, entity, _, _, wall, cpu, peak, pid in profiler.events:
+        process = "main" if pid == os.getpid() else "worker"
+        if process == "worker":
+            workers.add(pid)
+        row = stages.setdefault((process, name, entity or "-"), [0, 0.0, 0.0, 0])
+        row[0] += 1
+        row[1] += wall
+        row[2] += cpu
+        row[3] = max(row[3], peak)
+    primitives = {}
+    for (entity, prim), count in profiler.calls.items():
+        primitives.setdefault(entity or "-", {})[prim] = count
+    return {
+        "stages": [
+            {"process": process, "stage": name, "entity": entity, "count": n,
+             "wall_s": round(wall, 6), "cpu_s": round(cpu, 6), "peak_bytes": peak}
+            for (process, name, entity), (n, wall, cpu, peak) in stages.items()
+        ],
+        "workers": len(workers),
+        "primitive_calls": primitives,
+    }
+
+
+def print_stage_rows(rows: list, total_wall: float):
+    for row in sorted(rows, key=lambda r: -r["wall_s"]):
+        print(f"     {row['stage']:<14} {row['entity']:<8} {row['count']:>5} "
+              f"{row['wall_s'] * 1000:>9.2f} {row['cpu_s'] * 1000:>9.2f} "
+              f"{row['peak_bytes'] / 1024:>9.1f} {row['wall_s'] / total_wall:>6.1%}")
+
+
+def print_profile(summary: dict, total_wall: float, total_cpu: float):
+    """
+    Print the stage table. Main-process shares are of the run's wall time;
+    worker stages get their own table, with shares of the wall time summed
+    over every worker's stages.
+    """
+    header = f"{'count':>5} {'wall ms':>9} {'cpu ms':>9} {'peak KiB':>9} {'share':>6}"
+    print("  ⏱️  Profile")
+    print(f"     {'stage':<14} {'entity':<8} {header}")
+    print_stage_rows([row for row in summary["stages"] if row["process"] == "main"], total_wall)
+    print(f"     {'total':<14} {'':<8} {'':>5} {total_wall * 1000:>9.2f} {total_cpu * 1000:>9.2f}")
+    worker_rows = [row for row in summary["stages"] if row["process"] == "worker"]
+    if worker_rows:
+        worker_wall = sum(row["wall_s"] for row in worker_rows)
+        worker_cpu = sum(row["cpu_s"] for row in worker_rows)
+        print()
+        print(f"     {'worker stage':<14} {'entity':<8} {header}")
+        print_stage_rows(worker_rows, worker_wall)
+        processes = f"{summary['workers']} proc"
+        print(f"     {'summed':<14} {processes:<8} {'':>5} "
+              f"{worker_wall * 1000:>9.2f} {worker_cpu * 1000:>9.2f}")
+    print()
+    print(f"     {'primitive calls':<23} {'px':>6} {'rect':>6} {'ellipse':>7}")
+    for entity, calls in summary["primitive_calls"].items():
+        print(f"     {entity:<23} {calls.get('px', 0):>6} {calls.get('rect', 0):>6} "
+              f"{calls.get('ellipse', 0):>7}")
+
+
+def write_chrome_trace(path: Path, profiler: Profiler, origin: float, summary: dict):
+    """
+    Write the stage records in Chrome trace-event format (chrome://tracing,
+    Perfetto); the aggregated summary rides along under "otherData".
+    """
+    events = [
+        {
+            "name": name if entity is None else f"{name} {entity}",
+            "cat": name,
+            "ph": "X",
+            "ts": round((start - origin) * 1e6, 1),
+            "dur": round(wall * 1e6, 1),
+            "pid": pid,
+            "tid": pid,
+            "args": {"entity": entity, "self_cpu_ms": round(cpu * 1000, 3), "peak_bytes": peak},
+        }
+        for name, entity, start, wall, _, cpu, peak, pid in profiler.events
+    ]
+    path.write_text(json.dumps({
+        "traceEvents": events,
+        "displayTimeUnit": "ms",
+        "otherData": summary,
+    }, indent=1) + "\n")
+
+
+# ─── Rendering ─────────────────────────────────────────────────────
+def frame_jobs(entities: dict = None) -> list:
+    """Flatten the entity table into (entity, anim, frame) jobs in output order."""
+    if entities is None:
+        entities = ENTITIES
+    return [
+        (entity, anim, f)
+        for entity, spec in entities.items()
+        for anim, frame_count in spec["anims"].items()
+        for f in range(frame_count)
+    ]
+
+
+def parse_selectors(text: str) -> dict:
+    """
+    Parse --only selectors: `player:run,coin` → {"player": {"run"}, "coin": None}
+    (None = every animation). Raises ValueError naming an unknown entity or anim.
+    """
+    selection = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        entity, _, anim = item.partition(":")
+        if entity not in ENTITIES:
+            raise ValueError(f"unknown entity {entity!r} (expected one of: {', '.join(ENTITIES)})")
+        if not anim:
+            selection[entity] = None
+        elif anim not in ENTITIES[entity]["anims"]:
+            raise ValueError(f"{entity} has no animation {anim!r} "
+                             f"(expected one of: {', '.join(ENTITIES[entity]['anims'])})")
+        elif selection.get(entity, set()) is not None:
+            selection.setdefault(entity, set()).add(anim)
+    if not selection:
+        raise ValueError("no selectors given")
+    return selection
+
+
+def select_entities(selection: dict = None) -> dict:
+    """ENTITIES cut down to a parse_selectors() selection, in table order (None = all)."""
+    if selection is None:
+        return ENTITIES
+    return {
+        entity: {**spec, "anims": {
+            anim: n for anim, n in spec["anims"].items()
+            if selection[entity] is None or anim in selection[entity]
+        }}
+        for entity, spec in ENTITIES.items() if entity in selection
+    }
+
+
+def render_frame(entity: str, anim: str, frame: int) -> Image.Image:
+    """Render one frame of an entity to a PIL Image."""
+    spec = ENTITIES[entity]
+    img = Canvas(*spec["size"])
+    params = spec["params"].get(anim)
+    spec["draw"](img, frame, anim, **(params[frame % len(params)] if params else {}))
+    return img.to_image()
+
+
+def upscale(img: Image.Image, scale: int) -> Image.Image:
+    """`img` enlarged `scale`× with hard pixel edges (nearest-neighbor)."""
+    if scale == 1:
+        return img
+    return Image.fromarray(np.asarray(img).repeat(scale, axis=0).repeat(scale, axis=1))
+
+
+def sprite_name(entity: str, anim: str, frame: int) -> str:
+    """Output path of a frame relative to OUT_DIR (also its manifest key)."""
+    if ENTITIES[entity].get("single"):
+        return f"{entity}/{anim}.png"
+    return f"{entity}/{anim}_{frame}.png"
+
+
+def store_frame(job: tuple, img: Image.Image, digest: str, known: dict = None,
+                png: dict = None) -> tuple:
+    """
+    Save one rendered frame unless `known` (sprite name → pixel hash, from the
+    manifest) says the file on disk already holds these pixels; None = always
+    write. Returns the sizes from write_png, or None if the file was skipped.
+    """
+    entity, anim, frame = job
+    name = sprite_name(entity, anim, frame)
+    with stage("cache check"):
+        changed = known is None or not is_unchanged(OUT_DIR / name, digest, known.get(name))
+    if not changed:
+        return None
+    if ENTITIES[entity].get("single"):
+        return save_tile(entity, anim, img, png)
+    return save_frame(entity, anim, frame, img, png)
+
+
+def run_job(job: tuple, known: dict = None, png: dict = None, profile: bool = False,
+            write: bool = True) -> tuple:
+    """
+    Render and save one (entity, anim, frame) job. Safe to run in a worker process.
+
+    `known` and `png` are passed on to store_frame; with `write=False` the frame
+    is only rendered and hashed. Returns (image, pixel_hash, sizes, profile
+    records) — sizes is None if nothing was written, profile records None
+    unless `profile`.
+    """
+    entity, anim, frame = job
+    if profile:
+        enable_profiling().entity = entity
+    with stage("render"):
+        img = render_frame(entity, anim, frame)
+    with stage("hash"):
+        digest = pixel_hash(img)
+    sizes = store_frame(job, img, digest, known, png) if write else None
+    records = None
+    if profile:
+        PROFILER.entity = None
+        records = PROFILER.drain()
+    return img, digest, sizes, records
+
+
+def start_worker(profile: bool = False):
+    """
+    Process pool initializer. With profiling, a worker's one-time setup
+    (Pillow's lazy PNG plugin import, the first hash) is timed as its own
+    "worker startup" stage instead of inflating its first job.
+    """
+    if profile:
+        enable_profiling()
+        with stage("worker startup"):
+            img = Image.new("RGBA", (1, 1))
+            encode_png(img)
+            pixel_hash(img)
+
+
+def store_job(item: tuple, known: dict = None, png: dict = None, profile: bool = False) -> tuple:
+    """Pool-friendly store_frame for a (job, image, pixel_hash) item → (sizes, records)."""
+    job, img, digest = item
+    if profile:
+        enable_profiling().entity = job[0]
+    sizes = store_frame(job, img, digest, known, png)
+    records = None
+    if profile:
+        PROFILER.entity = None
+        records = PROFILER.drain()
+    return sizes, records
+
+
+def find_aliases(jobs: list, digests: list) -> dict:
+    """
+    Map each animation frame whose pixels exactly match an earlier frame of the
+    same entity to that first frame: {sprite name: canonical sprite name}.
+    Tiles and background pieces ("single" entities) are never aliased — the
+    tileset and level scenes reference them by name.
+    """
+    first = {}
+    aliases = {}
+    for (entity, anim, frame), digest in zip(jobs, digests):
+        if ENTITIES[entity].get("single"):
+            continue
+        name = sprite_name(entity, anim, frame)
+        canonical = first.setdefault((entity, digest), name)
+        if canonical != name:
+            aliases[name] = canonical
+    return aliases
+
+
+def render_all(jobs: list, workers: int = 1, known: dict = None, png: dict = None,
+               dedupe: bool = False) -> tuple:
+    """
+    Run all jobs, serially or across a process pool, and collect the frames
+    as {entity: {anim: [Image, ...]}} in job order — identical either way.
+
+    With `dedupe`, frames are hashed before anything is written and only the
+    first copy of each duplicate (see find_aliases) is saved.
+    Returns (all_sprites, {sprite_name: pixel_hash}, {written sprite name: sizes},
+    {alias sprite name: canonical sprite name}).
+    """
+    profile = PROFILER is not None
+    run = partial(run_job, known=known, png=png, profile=profile, write=not dedupe)
+    store = partial(store_job, known=known, png=png, profile=profile)
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=start_worker, initargs=(profile,)
+        )
+    with pool or contextlib.nullcontext():
+        def pmap(fn, items):
+            if pool is None:
+                return [fn(item) for item in items]
+            chunksize = max(1, len(items) // (workers * 4))
+            return list(pool.map(fn, items, chunksize=chunksize))
+
+        results = pmap(run, jobs)
+        aliases = {}
+        if dedupe:
+            aliases = find_aliases(jobs, [digest for _, digest, _, _ in results])
+            unique = [
+                i for i, job in enumerate(jobs) if sprite_name(*job) not in aliases
+            ]
+            stored = pmap(store, [(jobs[i], *results[i][:2]) for i in unique])
+            for i, (sizes, records) in zip(unique, stored):
+                img, digest, _, render_records = results[i]
+                results[i] = img, digest, sizes, render_records
+                if records is not None:
+                    PROFILER.merge(records)
+
+    all_sprites = {}
+    digests = {}
+    written = {}
+    for (entity, anim, frame), (img, digest, sizes, records) in zip(jobs, results):
+        if records is not None:
+            PROFILER.merge(records)
+        all_sprites.setdefault(entity, {}).setdefault(anim, []).append(img)
+        name = sprite_name(entity, anim, frame)
+        digests[name] = digest
+        if sizes is not None:
+            written[name] = sizes
+    return all_sprites, digests, written, aliases
+
+
+# ─── Build cache ───────────────────────────────────────────────────
+# assets/sprites/.manifest.json records, per output PNG, a hash of its raw
+# pixels and of the drawing code + palette entries that produced it. A PNG is
+# only re-encoded and rewritten when its pixels change, so unchanged files keep
+# their mtime and Godot does not re-import them.
+PRIMITIVES = (Canvas, rgba, ellipse_mask, px, rect, ellipse)
+
+
+def pixel_hash(img: Image.Image) -> str:
+    """Hash of an image's mode, size and raw pixels."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img.mode}:{img.width}x{img.height}:".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def dependencies(fn) -> list:
+    """
+    `fn` plus every function of this module it calls, transitively (e.g. a
+    draw function's static layers), in first-seen order. Primitives excluded.
+    """
+    seen = []
+    pending = [inspect.unwrap(fn)]
+    while pending:
+        fn = pending.pop()
+        if fn in seen or fn in PRIMITIVES:
+            continue
+        seen.append(fn)
+        codes = [fn.__code__]
+        while codes:
+            code = codes.pop()
+            codes.extend(c for c in code.co_consts if inspect.iscode(c))
+            for name in code.co_names:
+                ref = globals().get(name)
+                if inspect.isfunction(ref):
+                    ref = inspect.unwrap(ref)
+                    if ref.__module__ == __name__:
+                        pending.append(ref)
+    return seen
+
+
+def hash_code(h, fns) -> set:
+    """
+    Feed the compiled code of functions / classes to hash `h`: bytecode, names,
+    constants (recursing into nested code), default arguments and the values
+    of simple module constants they read (e.g. TILE_SIZE). Line numbers are
+    left out, so moving code or editing comments doesn't change the hash.
+    Returns the string constants seen (for PAL lookups).
+    """
+    strings = set()
+    codes = []
+    for obj in fns:
+        members = vars(obj).values() if inspect.isclass(obj) else [obj]
+        for fn in members:
+            if inspect.isfunction(fn) or hasattr(fn, "__wrapped__"):
+                fn = inspect.unwrap(fn)
+                h.update(repr(fn.__defaults__).encode())
+                codes.append(fn.__code__)
+    while codes:
+        code = codes.pop()
+        h.update(code.co_code)
+        h.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if inspect.iscode(const):
+                codes.append(const)
+            else:
+                h.update(repr(const).encode())
+                if isinstance(const, str):
+                    strings.add(const)
+        for name in code.co_names:
+            value = globals().get(name)
+            if isinstance(value, (int, float, str, tuple, Path)):
+                h.update(f"{name}={value!r}".encode())
+    return strings
+
+
+def source_hash(entity: str) -> str:
+    """Hash of the drawing code, palette entries and table entry behind an entity."""
+    spec = ENTITIES[entity]
+    h = hashlib.blake2b(digest_size=16)
+    strings = hash_code(h, [*PRIMITIVES, *dependencies(spec["draw"])])
+    strings |= set(re.findall(r"'(\w+)'", repr(spec["params"])))  # PAL keys in shapes
+    names = sorted(strings & PAL.keys())
+    h.update(repr([(name, PAL[name]) for name in names]).encode())
+    h.update(repr((spec["size"], spec["anims"], spec["params"])).encode())
+    return h.hexdigest()
+
+
+def stage_hash(fn, *data) -> str:
+    """Hash of a pipeline stage: the code of `fn` and its dependencies, plus `data`."""
+    h = hashlib.blake2b(digest_size=16)
+    hash_code(h, dependencies(fn))
+    h.update(repr(data).encode())
+    return h.hexdigest()
+
+
+def is_unchanged(path: Path, digest: str, known_digest: str = None) -> bool:
+    """
+    True if `path` already holds pixels hashing to `digest`. Trusts the manifest
+    when it has an entry; otherwise decodes the existing file (e.g. fresh clone).
+    """
+    if not path.exists():
+        return False
+    if known_digest is not None:
+        return known_digest == digest
+    try:
+        with Image.open(path) as existing:
+            return pixel_hash(existing.convert("RGBA")) == digest
+    except OSError:
+        return False
+
+
+def json_text(value, indent: int = 0) -> str:
+    """Pretty JSON with dicts one key per line but scalar lists kept inline."""
+    if isinstance(value, dict) and value:
+        pad = "  " * (indent + 1)
+        items = [f"{pad}{json.dumps(k)}: {json_text(v, indent + 1)}" for k, v in value.items()]
+        return "{\n" + ",\n".join(items) + "\n" + "  " * indent + "}"
+    if isinstance(value, list) and any(isinstance(v, (dict, list)) for v in value):
+        pad = "  " * (indent + 1)
+        items = [pad + json_text(v, indent + 1) for v in value]
+        return "[\n" + ",\n".join(items) + "\n" + "  " * indent + "]"
+    return json.dumps(value)
+
+
+def load_manifest() -> dict:
+    if not MANIFEST_PATH.exists():
+        return {}
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except ValueError:
+        return {}
+
+
+def save_manifest(manifest: dict):
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    if not MANIFEST_PATH.exists() or MANIFEST_PATH.read_text() != text:
+        MANIFEST_PATH.write_text(text)
+
+
+def load_aliases() -> dict:
+    if ALIASES_PATH.exists():
+        return json.loads(ALIASES_PATH.read_text())
+    return {}
+
+
+def save_aliases(aliases: dict):
+    """Write the --dedupe alias map ({} removes it: every frame has its own file)."""
+    if not aliases:
+        ALIASES_PATH.unlink(missing_ok=True)
+        return
+    text = json_text(aliases) + "\n"
+    if not ALIASES_PATH.exists() or ALIASES_PATH.read_text() != text:
+        ALIASES_PATH.write_text(text)
 
 
 # ─── I/O helpers ───────────────────────────────────────────────────
-def save_frame(entity: str, anim: str, frame: int, img: Image.Image):
-    """Save a single animation frame PNG."""
-    path = OUT_DIR / entity / f"{anim}_{frame}.png"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    img.save(path)
+# zlib strategies accepted by Pillow's PNG encoder (compress_type)
+ZLIB_STRATEGIES = {"default": 0, "filtered": 1, "huffman": 2, "rle": 3, "fixed": 4}
+
+
+def palette_order(colors: np.ndarray) -> tuple:
+    """
+    Order distinct packed RGBA `colors` (sorted, as np.unique returns them) for
+    a palette: translucent entries first, then PAL order, unlisted colors last.
+    Returns (palette as (n, 4) uint8 RGBA, remap from np.unique index to palette index).
+    """
+    pal_rank = {}
+    for i, color in enumerate(PAL.values()):
+        key = int(np.array(rgba(color), dtype=np.uint8).view("<u4")[0])
+        pal_rank.setdefault(key, i)
+    entries = colors.view(np.uint8).reshape(-1, 4)
+    order = sorted(
+        range(len(colors)),
+        key=lambda i: (entries[i, 3] == 255, pal_rank.get(int(colors[i]), len(pal_rank)), int(colors[i])),
+    )
+    remap = np.empty(len(colors), dtype=np.uint8)
+    remap[order] = np.arange(len(colors), dtype=np.uint8)
+    return entries[order], remap
+
+
+def to_indexed(img: Image.Image) -> tuple:
+    """
+    Convert an RGBA image to palette mode using PAL's colors, or return None if
+    it has more than 256 distinct colors. Translucent entries go first so the
+    tRNS chunk stays short; the rest follow PAL order (unlisted colors last).
+    Returns (P-mode image, tRNS alpha bytes or None).
+    """
+    packed = np.ascontiguousarray(np.asarray(img)).view("<u4")[..., 0]
+    colors, inverse = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        return None
+
+    palette, remap = palette_order(colors)
+    indexed = Image.frombytes("P", img.size, remap[inverse.reshape(packed.shape)].tobytes())
+    indexed.putpalette(palette[:, :3].tobytes())
+    alpha = palette[:, 3].tobytes().rstrip(b"\xff")
+    return indexed, alpha or None
+
+
+def encoder_options(png: dict = None) -> dict:
+    """The encode_png settings in an output options dict — all but "trim"."""
+    return {key: value for key, value in (png or {}).items() if key != "trim"}
 
 
-def save_tile(entity: str, name: str, img: Image.Image):
+def encode_png(img: Image.Image, png: dict = None) -> bytes:
+    """
+    Encode an RGBA image as PNG. `png` options: "indexed" (palette mode with
+    tRNS transparency, falling back to RGBA above 256 colors), "level" (zlib
+    level 0-9) and "strategy" (a ZLIB_STRATEGIES key). None = Pillow defaults.
+    """
+    png = png or {}
+    options = {}
+    if png.get("level") is not None:
+        options["compress_level"] = png["level"]
+    if png.get("strategy"):
+        options["compress_type"] = ZLIB_STRATEGIES[png["strategy"]]
+    if png.get("indexed"):
+        indexed = to_indexed(img)
+        if indexed is not None:
+            img, alpha = indexed
+            if alpha is not None:
+                options["transparency"] = alpha
+    buf = io.BytesIO()
+    img.save(buf, "PNG", **options)
+    return buf.getvalue()
+
+
+def write_png(path: Path, img: Image.Image, png: dict = None) -> tuple:
+    """
+    Encode and write a PNG. Returns (default RGBA bytes, bytes written) so
+    non-default encoder options can report what they saved.
+    """
+    with stage("encode"):
+        data = encode_png(img, png)
+    with stage("file io"):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    if not encoder_options(png):
+        return len(data), len(data)
+    with stage("encode (report)"):
+        return len(encode_png(img)), len(data)
+
+
+def save_frame(entity: str, anim: str, frame: int, img: Image.Image, png: dict = None) -> tuple:
+    """Save a single animation frame PNG (cropped to its alpha bounding box if png["trim"])."""
+    if png and png.get("trim"):
+        img = trim_image(img)
+    return write_png(OUT_DIR / entity / f"{anim}_{frame}.png", img, png)
+
+
+def save_tile(entity: str, name: str, img: Image.Image, png: dict = None) -> tuple:
     """Save a single tile PNG."""
-    path = OUT_DIR / entity / f"{name}.png"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    img.save(path)
+    return write_png(OUT_DIR / entity / f"{name}.png", img, png)
 
 
-# ─── Contact Sheet ─────────────────────────────────────────────────
-def generate_contact_sheet(all_sprites: dict):
+def filter_scanlines(lines: np.ndarray, prior: np.ndarray) -> bytes:
     """
-    Generate a review contact sheet: rows = entities, columns = frames.
-    Each sprite is scaled 4x for visibility.
+    PNG-filter a block of scanlines (n × stride bytes) with the Up filter —
+    the best fit for upscaled pixel art, where most lines repeat the one
+    above. `prior` is the scanline above the block (zeros at the top).
     """
-    SCALE = 4
-    PADDING = 2
-    LABEL_SPACE = 0  # No text labels (Pillow default font is tiny)
+    out = np.empty((len(lines), lines.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = 2
+    out[:1, 1:] = lines[:1] - prior
+    out[1:, 1:] = lines[1:] - lines[:-1]  # uint8 arithmetic wraps mod 256
+    return out.tobytes()
+
 
-    # Flatten: list of (entity, anim, frames_list)
-    rows = []
+def adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    """Adler-32 of A + B from adler32(A), adler32(B) and len(B) (zlib's adler32_combine)."""
+    base = 65521
+    rem = len2 % base
+    sum1 = adler1 & 0xFFFF
+    sum2 = rem * sum1 % base
+    sum1 = (sum1 + (adler2 & 0xFFFF) + base - 1) % base
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + base - rem) % base
+    return sum2 << 16 | sum1
+
+
+class PngStream:
+    """
+    Write an RGBA PNG a band of rows at a time, so only the current band is
+    ever in memory. Also hashes the pixels as they pass (same digest as
+    pixel_hash on the whole image), available as `digest` after close().
+
+    Each band is deflated on its own (full flush), so with a `cache` dict a
+    band seen before — same pixels, same row above — is reused compressed.
+    """
+
+    def __init__(self, path: Path, width: int, height: int, level: int = 6, cache: dict = None):
+        self.file = open(path, "wb")
+        self.level = level
+        self.cache = cache
+        self.prior = np.zeros(width * 4, dtype=np.uint8)
+        self.adler = 1
+        self.hash = hashlib.blake2b(digest_size=16)
+        self.hash.update(f"RGBA:{width}x{height}:".encode())
+        self.digest = None
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        self.chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        # zlib header: deflate, 32K window, FLEVEL hint for `level`, check bits
+        flags = (0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3) << 6
+        self.chunk(b"IDAT", bytes([0x78, flags + 31 - (0x7800 + flags) % 31]))
+
+    def chunk(self, tag: bytes, data: bytes):
+        self.file.write(struct.pack(">I", len(data)) + tag + data)
+        self.file.write(struct.pack(">I", zlib.crc32(tag + data)))
+
+    def write(self, band: np.ndarray):
+        """Append rows: a (rows, width, 4) uint8 array."""
+        raw = band.tobytes()
+        self.hash.update(raw)
+        lines = band.reshape(len(band), -1)
+        key = (self.prior.tobytes(), raw)
+        packed = None if self.cache is None else self.cache.get(key)
+        if packed is None:
+            filtered = filter_scanlines(lines, self.prior)
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            packed = (
+                zlib.adler32(filtered), len(filtered),
+                compressor.compress(filtered) + compressor.flush(zlib.Z_FULL_FLUSH),
+            )
+            if self.cache is not None:
+                self.cache[key] = packed
+        self.adler = adler32_combine(self.adler, packed[0], packed[1])
+        self.chunk(b"IDAT", packed[2])
+        self.prior = lines[-1]
+
+    def close(self):
+        if self.digest is None:
+            # Empty final block, then the Adler-32 of all filtered data
+            final = zlib.compressobj(self.level, zlib.DEFLATED, -15).flush()
+            self.chunk(b"IDAT", final + struct.pack(">I", self.adler))
+            self.chunk(b"IEND", b"")
+            self.digest = self.hash.hexdigest()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+
+# ─── Trimming (--trim) ─────────────────────────────────────────────
+# Animation frames are saved cropped to their alpha bounding box, and
+# TRIM_PATH records where each crop sat in the full frame. Scene wiring turns
+# that into AtlasTexture region + margin, so sprites land exactly where the
+# untrimmed frames did while the empty border costs no texture memory.
+# The mode stays on for later runs until --no-trim, read from what is
+# committed (TRIM_PATH, trimmed scene wiring) rather than the gitignored
+# manifest: a run that saved whole frames under trimmed scene wiring would
+# show every sprite cropped and shifted.
+
+
+def trim_boxes(stack: np.ndarray) -> np.ndarray:
+    """
+    Alpha bounding boxes of (n, h, w, 4) frames as (n, 4) [x, y, w, h], in
+    one vectorized scan; a fully transparent frame keeps a 1×1 box at 0, 0.
+    """
+    opaque = stack[..., 3] > 0
+    rows = opaque.any(axis=2)
+    cols = opaque.any(axis=1)
+    top = rows.argmax(axis=1)
+    bottom = rows.shape[1] - rows[:, ::-1].argmax(axis=1)
+    left = cols.argmax(axis=1)
+    right = cols.shape[1] - cols[:, ::-1].argmax(axis=1)
+    empty = ~rows.any(axis=1)
+    top[empty] = left[empty] = 0
+    bottom[empty] = right[empty] = 1
+    return np.stack([left, top, right - left, bottom - top], axis=1)
+
+
+def trim_image(img: Image.Image) -> Image.Image:
+    """`img` cropped to its alpha bounding box."""
+    x, y, w, h = trim_boxes(np.asarray(img)[None])[0].tolist()
+    return img.crop((x, y, x + w, y + h))
+
+
+def trim_frames(all_sprites: dict, aliases: dict = None) -> dict:
+    """
+    Trim metadata for every animation frame written (aliases share their
+    canonical frame's file): {sprite name: {"offset", "size", "source_size"}}.
+    """
+    aliases = aliases or {}
+    trims = {}
     for entity, anims in all_sprites.items():
-        for anim_name, frame_list in anims.items():
-            rows.append((entity, anim_name, frame_list))
+        if ENTITIES[entity].get("single"):
+            continue
+        for anim, frames in anims.items():
+            boxes = trim_boxes(np.stack([np.asarray(f) for f in frames]))
+            for f, (img, (x, y, w, h)) in enumerate(zip(frames, boxes.tolist())):
+                name = sprite_name(entity, anim, f)
+                if name not in aliases:
+                    trims[name] = {"offset": [x, y], "size": [w, h], "source_size": list(img.size)}
+    return trims
+
+
+def load_trims() -> dict:
+    if TRIM_PATH.exists():
+        return json.loads(TRIM_PATH.read_text())
+    return {}
+
+
+def save_trims(trims: dict):
+    """Write the --trim offset metadata ({} removes it: frames are saved whole)."""
+    if not trims:
+        TRIM_PATH.unlink(missing_ok=True)
+        return
+    text = json_text(trims) + "\n"
+    if not TRIM_PATH.exists() or TRIM_PATH.read_text() != text:
+        TRIM_PATH.write_text(text)
+
+
+def resolve_trim(args: argparse.Namespace, report: bool = True):
+    """
+    Without --trim / --no-trim, keep trimming while the committed tree says
+    frames are trimmed: TRIM_PATH exists or a scene crops through trim wiring.
+    """
+    if args.trim is None:
+        args.trim = TRIM_PATH.exists() or bool(trim_wired_scenes())
+        if args.trim and report:
+            print(f"  ✂️  Trimming kept on ({TRIM_PATH} or trimmed scene wiring present; "
+                  f"--no-trim turns it off)")
+
+
+def trim_wired_scenes() -> list:
+    """Scenes still showing frames through the AtlasTextures --trim --wire adds."""
+    return [
+        path for path in sorted(SCENES_DIR.glob("*.tscn"))
+        if '[sub_resource type="AtlasTexture" id="AtlasTexture_' in path.read_text()
+    ]
+
 
-    if not rows:
+def warn_trim_wiring(args: argparse.Namespace):
+    """Loud warning for whole frames saved under trimmed scene wiring, left unwired."""
+    if args.trim or args.wire:
         return
+    for path in trim_wired_scenes():
+        print(f"  ⚠️  {path} still crops frames for --trim, but they were saved whole: "
+              f"sprites will render cropped and shifted until you run with --wire (or --trim)")
 
-    max_frames = max(len(r[2]) for r in rows)
+
+# ─── Collision shapes ──────────────────────────────────────────────
+# Polygons traced from the alpha masks, so collision follows the art: the
+# mask's outer contour is walked along pixel edges, straight runs collapse to
+# corners, and the least significant corners are dropped (Visvalingam) until
+# the shape fits a vertex budget.
+COLLISION_ALPHA = 128  # pixels at least this opaque are solid (not the slime's shadow)
+TILE_VERTICES = 8
+BODY_VERTICES = 8
+
+
+def trace_contour(mask: np.ndarray) -> list:
+    """
+    Outer contour of the largest 4-connected shape in a boolean (h, w) mask,
+    as pixel-corner (x, y) points clockwise on screen from the top-left-most
+    corner, with straight runs collapsed. [] for an empty mask.
+    """
+    padded = np.pad(mask, 1)
+    inner = padded[1:-1, 1:-1]
+    ys, xs = np.nonzero(inner & ~padded[:-2, 1:-1])
+    edges = [((x, y), (x + 1, y)) for x, y in zip(xs.tolist(), ys.tolist())]  # top
+    ys, xs = np.nonzero(inner & ~padded[1:-1, 2:])
+    edges += [((x + 1, y), (x + 1, y + 1)) for x, y in zip(xs.tolist(), ys.tolist())]  # right
+    ys, xs = np.nonzero(inner & ~padded[2:, 1:-1])
+    edges += [((x + 1, y + 1), (x, y + 1)) for x, y in zip(xs.tolist(), ys.tolist())]  # bottom
+    ys, xs = np.nonzero(inner & ~padded[1:-1, :-2])
+    edges += [((x, y + 1), (x, y)) for x, y in zip(xs.tolist(), ys.tolist())]  # left
+
+    outgoing = {}
+    for start, end in edges:
+        outgoing.setdefault(start, []).append(end)
+    loops = []
+    while outgoing:
+        first = min(outgoing, key=lambda p: (p[1], p[0]))
+        loop = [first]
+        prev, point = None, first
+        while True:
+            ends = outgoing[point]
+            if len(ends) > 1 and prev is not None:
+                # Two shapes touch at a corner: turn right to stay on this one
+                dx, dy = point[0] - prev[0], point[1] - prev[1]
+                ends.sort(key=lambda e: (e[0] - point[0], e[1] - point[1]) != (-dy, dx))
+            prev, point = point, ends.pop(0)
+            if not ends:
+                del outgoing[prev]
+            if point == first:
+                break
+            loop.append(point)
+        loops.append(loop)
+    if not loops:
+        return []
+    return collapse(max(loops, key=polygon_area))
+
+
+def polygon_area(points: list) -> float:
+    """Shoelace area; positive for clockwise-on-screen (y down) polygons."""
+    return sum(
+        x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1])
+    ) / 2
+
+
+def collapse(points: list) -> list:
+    """Drop vertices lying on the straight line between their neighbors."""
+    out = []
+    for i, (x, y) in enumerate(points):
+        (prev_x, prev_y), (next_x, next_y) = points[i - 1], points[(i + 1) % len(points)]
+        if (x - prev_x) * (next_y - y) != (y - prev_y) * (next_x - x):
+            out.append((x, y))
+    return out
+
+
+def convex_hull(points: list) -> list:
+    """Convex hull (monotone chain), clockwise on screen from the top-left-most point."""
+    pts = sorted(set(points))
+    if len(pts) < 3:
+        return pts
+
+    def half(seq):
+        chain = []
+        for p in seq:
+            while len(chain) >= 2 and ((chain[-1][0] - chain[-2][0]) * (p[1] - chain[-2][1])
+                                       - (chain[-1][1] - chain[-2][1]) * (p[0] - chain[-2][0])) <= 0:
+                chain.pop()
+            chain.append(p)
+        return chain
+
+    hull = half(pts)[:-1] + half(reversed(pts))[:-1]
+    start = hull.index(min(hull, key=lambda p: (p[1], p[0])))
+    return hull[start:] + hull[:start]
+
+
+def simplify(points: list, budget: int) -> list:
+    """
+    Visvalingam–Whyatt: drop the vertex spanning the smallest triangle with
+    its neighbors until at most `budget` remain; starts from the top-left-most.
+    """
+    points = list(points)
+    while len(points) > max(budget, 3):
+        areas = [
+            abs((x - prev_x) * (next_y - prev_y) - (next_x - prev_x) * (y - prev_y))
+            for (prev_x, prev_y), (x, y), (next_x, next_y)
+            in zip(points[-1:] + points[:-1], points, points[1:] + points[:1])
+        ]
+        del points[areas.index(min(areas))]
+    if not points:
+        return points
+    start = points.index(min(points, key=lambda p: (p[1], p[0])))
+    return points[start:] + points[:start]
+
+
+def solid_mask(frames: list) -> np.ndarray:
+    """Union of the frames' solid (alpha ≥ COLLISION_ALPHA) pixels, as an (h, w) bool mask."""
+    return (np.stack([np.asarray(f)[..., 3] for f in frames]) >= COLLISION_ALPHA).any(axis=0)
+
+
+def alpha_polygon(frames: list, budget: int, convex: bool = False) -> tuple:
+    """
+    Collision polygon for frames of one size: the solid mask's contour (or
+    its convex hull), simplified to `budget` vertices, centered on the frame
+    as Godot centers sprites. Flat (x0, y0, x1, y1, ...) or None if empty.
+    """
+    mask = solid_mask(frames)
+    points = trace_contour(mask)
+    if not points:
+        return None
+    if convex:
+        points = convex_hull(points)
+    h, w = mask.shape
+    centered = (v for x, y in simplify(points, budget) for v in (x - w / 2, y - h / 2))
+    return tuple(int(v) if v.is_integer() else v for v in centered)
+
+
+def tile_polygons(tile_imgs: dict) -> dict:
+    """Each tile's collision polygon: FROM_ALPHA entries traced, the rest from TILES as is."""
+    return {
+        name: alpha_polygon(tile_imgs[name], TILE_VERTICES) if polygon == FROM_ALPHA else polygon
+        for name, polygon in TILES.items()
+    }
+
+
+# ─── Tile variants (--tile-variants) ───────────────────────────────
+# Seeded re-rolls of every tile's details, so long runs of one tile don't
+# repeat. Each detail in TILE_DETAILS is scattered with hash noise over the
+# detail-free tile (draw_tile(details=False)), for all variants of a tile in
+# one array pass. Details only recolor interior pixels of the color they sit
+# on, so a variant keeps the base tile's bands and 1 px border and joins every
+# neighbor the base tile joins. Variant k depends on the seed, not on how
+# many are generated.
+TILE_VARIANT_SEED = 1
+SPECKLE = ((0, 0),)
+TUFT = ((0, 0), (0, 1))
+KNOT = ((0, 0), (1, 0), (0, 1))
+TILE_DETAILS = {  # tile → [(on color, paint color, stamp (dx, dy) offsets, expected count)]
+    "grass_top": [("grass", "grass_light", TUFT, 4), ("dirt", "dirt_shadow", SPECKLE, 6)],
+    "dirt": [("dirt", "dirt_shadow", SPECKLE, 10), ("dirt", "dirt_dark", SPECKLE, 3)],
+    "grass_left": [("dirt", "dirt_shadow", SPECKLE, 4)],
+    "grass_right": [("dirt", "dirt_shadow", SPECKLE, 4)],
+    "wood_left": [("wood", "wood_shadow", KNOT, 0.5)],
+    "wood_mid": [("wood", "wood_shadow", KNOT, 1)],
+    "wood_right": [("wood", "wood_shadow", KNOT, 0.5)],
+}
+
+
+def hash_noise(salt: int, *coords: np.ndarray) -> np.ndarray:
+    """
+    Uniform [0, 1) noise over broadcast integer coordinate grids: a lowbias32
+    integer hash per coordinate, so the same inputs give the same noise on
+    every run and platform.
+    """
+    h = np.full(np.broadcast_shapes(*(c.shape for c in coords)), salt & 0xFFFFFFFF, dtype=np.uint32)
+    for c in coords:
+        h ^= c.astype(np.uint32)
+        h ^= h >> 16
+        h *= 0x7FEB352D
+        h ^= h >> 15
+        h *= 0x846CA68B
+        h ^= h >> 16
+    return h / 2.0 ** 32
+
+
+def tile_variants(count: int, seed: int = TILE_VARIANT_SEED) -> dict:
+    """{tile: (count, TILE_SIZE, TILE_SIZE, 4) uint8 array} of variants 1..count."""
+    k, y, x = np.ogrid[1:count + 1, :TILE_SIZE, :TILE_SIZE]
+    interior = np.zeros((TILE_SIZE, TILE_SIZE), dtype=bool)
+    interior[1:-1, 1:-1] = True
+    variants = {}
+    for name in TILES:
+        canvas = Canvas(TILE_SIZE, TILE_SIZE)
+        draw_tile(canvas, 0, name, **{**ENTITIES["tiles"]["params"][name][0], "details": False})
+        batch = np.repeat(canvas.data[None], count, axis=0)
+        for on, paint, stamp, expected in TILE_DETAILS.get(name, []):
+            surface = (canvas.data == rgba(PAL[on])).all(axis=-1) & interior
+            # Anchors whose whole stamp lands on the surface (the border ring
+            # is off it, so np.roll's wraparound never adds any)
+            anchors = surface.copy()
+            for dx, dy in stamp:
+                anchors &= np.roll(surface, (-dy, -dx), axis=(0, 1))
+            if not anchors.any():
+                continue
+            salt = zlib.crc32(f"{seed}/{name}/{on}/{paint}".encode())
+            chosen = anchors & (hash_noise(salt, k, y, x) < expected / anchors.sum())
+            painted = chosen.copy()
+            for dx, dy in stamp:
+                painted |= np.roll(chosen, (dy, dx), axis=(1, 2))
+            batch[painted] = rgba(PAL[paint])
+        variants[name] = batch
+    return variants
+
+
+# ─── Tileset ───────────────────────────────────────────────────────
+def build_tile_atlas(tiles: list) -> np.ndarray:
+    """
+    Lay tile images out row-major, TILE_ATLAS_COLUMNS per row, in one
+    reshape/transpose over the stacked (N, 16, 16, 4) array.
+    """
+    stack = np.stack([np.asarray(img) for img in tiles])
+    n = len(stack)
+    cols = min(n, TILE_ATLAS_COLUMNS)
+    rows = -(-n // cols)
+    if rows * cols > n:
+        pad = np.zeros((rows * cols - n, TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+        stack = np.concatenate([stack, pad])
+    grid = stack.reshape(rows, cols, TILE_SIZE, TILE_SIZE, 4).transpose(0, 2, 1, 3, 4)
+    return grid.reshape(rows * TILE_SIZE, cols * TILE_SIZE, 4)
+
+
+def tileset_text(uid: str, polygons: dict, variants: int = 0) -> str:
+    """
+    Render assets/tileset.tres for the TILES table, with `polygons` from
+    tile_polygons(); each tile's `variants` cells follow the base tiles.
+    """
+    lines = [
+        f'[gd_resource type="TileSet" load_steps=2 format=3 uid="{uid}"]',
+        "",
+        f'[ext_resource type="Texture2D" path="res://{TILE_ATLAS_PATH.as_posix()}" id="1_atlas"]',
+        "",
+        '[sub_resource type="TileSetAtlasSource" id="TileSetAtlasSource_0"]',
+        'texture = ExtResource("1_atlas")',
+        f"texture_region_size = Vector2i({TILE_SIZE}, {TILE_SIZE})",
+    ]
+    cells = list(TILES) + [name for name in TILES for _ in range(variants)]
+    for i, polygon in enumerate(polygons[name] for name in cells):
+        cell = f"{i % TILE_ATLAS_COLUMNS}:{i // TILE_ATLAS_COLUMNS}/0"
+        lines.append(f"{cell} = 0")
+        if polygon is not None:
+            points = ", ".join(godot_number(v) for v in polygon)
+            lines.append(f"{cell}/physics_layer_0/polygon_0/points = PackedVector2Array({points})")
+    lines += [
+        "",
+        "[resource]",
+        f"tile_size = Vector2i({TILE_SIZE}, {TILE_SIZE})",
+        "physics_layer_0/collision_layer = 1",
+        "physics_layer_0/collision_mask = 0",
+        'sources/0 = SubResource("TileSetAtlasSource_0")',
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def generate_tileset(tile_imgs: dict, force: bool = False, png: dict = None,
+                     variants: int = 0, seed: int = TILE_VARIANT_SEED) -> dict:
+    """
+    Write tiles/atlas.png and assets/tileset.tres from the rendered tiles,
+    plus `variants` seeded variants per tile (see tile_variants).
+    Returns {path: sizes} for PNGs written (see write_png).
+    """
+    written = {}
+    tiles = [tile_imgs[name][0] for name in TILES]
+    if variants:
+        tiles += [v for batch in tile_variants(variants, seed).values() for v in batch]
+    atlas = Image.fromarray(build_tile_atlas(tiles))
+    if force or not is_unchanged(TILE_ATLAS_PATH, pixel_hash(atlas)):
+        written[TILE_ATLAS_PATH.as_posix()] = write_png(TILE_ATLAS_PATH, atlas, png)
+
+    # Keep the TileSet's UID so level scenes that reference it stay valid
+    uid = "uid://ts_platformer_01"
+    old_text = TILESET_PATH.read_text() if TILESET_PATH.exists() else ""
+    match = re.search(r'\[gd_resource [^\]]*uid="([^"]+)"', old_text)
+    if match:
+        uid = match.group(1)
+    text = tileset_text(uid, tile_polygons(tile_imgs), variants)
+    if force or text != old_text:
+        TILESET_PATH.write_text(text)
+    extra = f" + {variants * len(TILES)} variants" if variants else ""
+    print(f"  🧩 Tileset: {TILESET_PATH} ({len(TILES)} tiles{extra}, "
+          f"atlas {atlas.width}×{atlas.height})")
+    return written
+
+
+# ─── Atlas packing ─────────────────────────────────────────────────
+# Packs frames into one texture per entity (or one for everything) so the HTML5
+# build fetches and binds a single image instead of one per frame. Regions are
+# written to a JSON sidecar next to the atlas, keyed by sprite name.
+def pack_rects(sizes: list, width: int, height: int) -> list:
+    """
+    MaxRects bin packing (best short side fit). Places (w, h) rects into a
+    width×height bin; returns [(x, y), ...] in input order, or None if they
+    don't fit.
+    """
+    free = [(0, 0, width, height)]
+    placed = [None] * len(sizes)
+    order = sorted(range(len(sizes)), key=lambda i: (-max(sizes[i]), -sizes[i][0] * sizes[i][1]))
+
+    for i in order:
+        w, h = sizes[i]
+        best = None
+        for fx, fy, fw, fh in free:
+            if w <= fw and h <= fh:
+                score = (min(fw - w, fh - h), max(fw - w, fh - h), fy, fx)
+                if best is None or score < best:
+                    best = score
+        if best is None:
+            return None
+        x, y = best[3], best[2]
+        placed[i] = (x, y)
+
+        # Split every free rect the new one overlaps into its maximal leftovers
+        kept, split = [], []
+        for fx, fy, fw, fh in free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                kept.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                split.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                split.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                split.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                split.append((fx, y + h, fw, fy + fh - y - h))
+
+        # Drop free rects fully contained in another. `kept` rects were already
+        # maximal among themselves, so only pairs involving a new rect can nest.
+        def contains(b, a):
+            return (b[0] <= a[0] and b[1] <= a[1]
+                    and a[0] + a[2] <= b[0] + b[2] and a[1] + a[3] <= b[1] + b[3])
+
+        split = [
+            a for j, a in enumerate(split)
+            if not any(contains(b, a) for b in kept)
+            and not any(contains(b, a) and (b != a or k < j) for k, b in enumerate(split) if k != j)
+        ]
+        free = [a for a in kept if not any(contains(b, a) for b in split)] + split
+    return placed
+
+
+def next_pot(n: int) -> int:
+    return 1 << max(n - 1, 0).bit_length()
+
+
+def pack_atlas(sizes: list, padding: int = 1, pot: bool = False) -> tuple:
+    """
+    Find a compact atlas layout for `sizes`, trying a range of widths and
+    keeping the smallest, squarest result. `padding` transparent pixels
+    separate frames from each other and from the atlas border.
+
+    Returns ((atlas_w, atlas_h), [(x, y), ...]).
+    """
+    padded = [(w + padding, h + padding) for w, h in sizes]
+    min_w = max(w for w, _ in padded)
+    tall = sum(h for _, h in padded)
+    side = math.isqrt(sum(w * h for w, h in padded))
+    # Candidate widths around a square layout (never a long strip — WebGL caps
+    # texture size), plus exact multiples of the widest frame
+    max_w = max(min_w, 2 * side)
+
+    if pot:
+        widths = [next_pot(min_w + padding) << k for k in range(16)]
+        widths = [w for w in widths if w - padding <= max(max_w, next_pot(side))] or widths[:1]
+    else:
+        cols = side // min_w
+        widths = {min_w * k for k in range(max(cols - 2, 1), cols + 3)}
+        widths |= {side * k // 8 for k in range(4, 17)}
+        widths = [w + padding for w in widths if min_w <= w <= max_w]
+
+    best = None
+    for width in sorted(widths):
+        placed = pack_rects(padded, width - padding, tall)
+        if placed is None:
+            continue
+        used_w = max(x + w for (x, _), (w, _) in zip(placed, padded)) + padding
+        used_h = max(y + h for (_, y), (_, h) in zip(placed, padded)) + padding
+        if pot:
+            used_w, used_h = next_pot(used_w), next_pot(used_h)
+        # Smallest area wins, with a penalty for lopsided sheets
+        aspect = max(used_w, used_h) / min(used_w, used_h)
+        score = (used_w * used_h * (1 + (aspect - 1) / 10), used_w)
+        if best is None or score < best[0]:
+            best = (score, (used_w, used_h), [(x + padding, y + padding) for x, y in placed])
+    return best[1], best[2]
+
+
+def generate_atlases(all_sprites: dict, mode: str, padding: int = 1, pot: bool = False,
+                     force: bool = False, png: dict = None, aliases: dict = None,
+                     trims: dict = None) -> dict:
+    """
+    Pack frames into atlases under ATLAS_DIR — one per entity (`mode="entity"`)
+    or one shared `sprites` atlas (`mode="all"`) — and write a JSON sidecar of
+    regions for each. Frames in `aliases` are not packed again; their sidecar
+    entry reuses the canonical frame's region. Frames in `trims` (see
+    trim_frames) are packed cropped, with their offset and source size in
+    the sidecar.
+    Returns {path: sizes} for PNGs written (see write_png).
+    """
+    aliases = aliases or {}
+    trims = trims or {}
+    groups = {}
+    for entity, anims in all_sprites.items():
+        if not ENTITIES[entity].get("packed", True):
+            continue
+        key = entity if mode == "entity" else "sprites"
+        for anim, frames in anims.items():
+            for f, img in enumerate(frames):
+                name = sprite_name(entity, anim, f)
+                trim = trims.get(aliases.get(name, name))
+                if trim is not None:
+                    (x, y), (w, h) = trim["offset"], trim["size"]
+                    img = img.crop((x, y, x + w, y + h))
+                groups.setdefault(key, []).append((name, img))
+
+    ATLAS_DIR.mkdir(parents=True, exist_ok=True)
+    written = {}
+    for key, entries in groups.items():
+        items = [(name, img) for name, img in entries if name not in aliases]
+        sizes = [img.size for _, img in items]
+        (aw, ah), placed = pack_atlas(sizes, padding, pot)
+        data = np.zeros((ah, aw, 4), dtype=np.uint8)
+        for (_, img), (x, y) in zip(items, placed):
+            data[y:y + img.height, x:x + img.width] = np.asarray(img)
+        atlas = Image.fromarray(data)
+
+        png_path = ATLAS_DIR / f"{key}.png"
+        if force or not is_unchanged(png_path, pixel_hash(atlas)):
+            written[png_path.as_posix()] = write_png(png_path, atlas, png)
+
+        used = sum(w * h for w, h in sizes)
+        regions = {
+            name: [x, y, img.width, img.height] for (name, img), (x, y) in zip(items, placed)
+        }
+        frames = {}
+        for name, _ in entries:
+            canonical = aliases.get(name, name)
+            frames[name] = {"region": regions[canonical]}
+            if canonical in trims:
+                frames[name]["offset"] = trims[canonical]["offset"]
+                frames[name]["source_size"] = trims[canonical]["source_size"]
+        sidecar = {
+            "texture": f"res://{png_path.as_posix()}",
+            "size": [aw, ah],
+            "padding": padding,
+            "occupancy": round(used / (aw * ah), 4),
+            "frames": frames,
+        }
+        text = json_text(sidecar) + "\n"
+        json_path = ATLAS_DIR / f"{key}.json"
+        if force or not json_path.exists() or json_path.read_text() != text:
+            json_path.write_text(text)
+        print(f"  🗺️  Atlas {png_path} ({aw}×{ah}, {len(items)} frames, "
+              f"{used / (aw * ah):.1%} occupied)")
+    return written
+
+
+# ─── Multi-resolution output (--scales, --mips) ────────────────────
+# Pre-scaled copies of every frame, tile and background piece for high-DPI
+# builds, so nothing is upscaled at runtime: assets/sprites_{n}x/ mirrors
+# assets/sprites/ at n× (nearest-neighbor) and --mips adds
+# assets/sprites_mip{level}/ at 1/2^level, down to 1 px on the short side.
+# Each resolution is one array operation over all frames of an entity, and a
+# file is only re-encoded when its native frame changed. With --trim the
+# upscaled frames are cropped to their native trim box × n, so trim.json
+# scales exactly; mip levels can't be (odd offsets don't halve), so --mips
+# and --trim are exclusive.
+def parse_scales(text: str) -> list:
+    """Parse --scales: `2,4` → [2, 4]. Raises ValueError for anything but integers ≥ 2."""
+    try:
+        scales = sorted({int(part) for part in text.split(",") if part.strip()})
+    except ValueError:
+        raise ValueError(f"expected comma-separated integers, not {text!r}") from None
+    if not scales or scales[0] < 2:
+        raise ValueError("scales must be integers of 2 or more")
+    return scales
+
+
+def scale_dir(scale: int) -> Path:
+    return OUT_DIR.with_name(f"{OUT_DIR.name}_{scale}x")
+
+
+def mip_dir(level: int) -> Path:
+    return OUT_DIR.with_name(f"{OUT_DIR.name}_mip{level}")
+
+
+def upscale_batch(stack: np.ndarray, scale: int) -> np.ndarray:
+    """(N, H, W, 4) frames enlarged `scale`× with hard pixel edges."""
+    return stack.repeat(scale, axis=1).repeat(scale, axis=2)
+
+
+def downsample_batch(stack: np.ndarray) -> np.ndarray:
+    """
+    (N, H, W, 4) frames halved: each 2×2 block averaged with its colors
+    weighted by alpha, so transparent pixels don't darken the edges.
+    """
+    n, h, w, _ = stack.shape
+    blocks = stack[:, :h // 2 * 2, :w // 2 * 2].reshape(n, h // 2, 2, w // 2, 2, 4).astype(np.uint32)
+    alpha = blocks[..., 3:].sum(axis=(2, 4))
+    color = (blocks[..., :3] * blocks[..., 3:]).sum(axis=(2, 4))
+    out = np.empty((n, h // 2, w // 2, 4), dtype=np.uint8)
+    out[..., :3] = (color + alpha // 2) // np.maximum(alpha, 1)
+    out[..., 3:] = (alpha + 2) // 4
+    return out
+
+
+def generate_resolutions(all_sprites: dict, scales: list, mips: bool = False,
+                         unchanged: set = frozenset(), png: dict = None) -> dict:
+    """
+    Write every rendered frame at each of `scales` and, with `mips`, its
+    downsampled mip chain. Files of sprite names in `unchanged` (pixels as
+    last run) are kept if present. With png["trim"], animation frames are
+    cropped to their trim box at each scale. Returns {path: sizes} for PNGs written.
+    """
+    trim = bool(png and png.get("trim"))
+    if trim and mips:
+        raise ValueError("--mips can't be combined with --trim")
+    written = {}
+    levels = 0
+    for entity, anims in all_sprites.items():
+        names = [sprite_name(entity, anim, f) for anim, frames in anims.items() for f in range(len(frames))]
+        stack = np.stack([np.asarray(img) for frames in anims.values() for img in frames])
+        boxes = trim_boxes(stack).tolist() if trim and not ENTITIES[entity].get("single") else None
+        outputs = [(scale_dir(scale), upscale_batch(stack, scale)) for scale in scales]
+        level = 0
+        while mips and min(stack.shape[1:3]) > 1:
+            level += 1
+            stack = downsample_batch(stack)
+            outputs.append((mip_dir(level), stack))
+        levels = max(levels, level)
+        for (root, batch), scale in zip(outputs, scales + [None] * level):
+            for i, (name, pixels) in enumerate(zip(names, batch)):
+                if boxes is not None:
+                    x, y, w, h = (v * scale for v in boxes[i])
+                    pixels = pixels[y:y + h, x:x + w]
+                path = root / name
+                if name not in unchanged or not path.exists():
+                    written[path.as_posix()] = write_png(path, Image.fromarray(pixels), png)
+    sets = [f"{scale}×" for scale in scales] + ([f"{levels} mip levels"] if mips else [])
+    files = len(frame_jobs({entity: ENTITIES[entity] for entity in all_sprites})) * (len(scales) + levels)
+    print(f"  🔍 Resolutions: {', '.join(sets)} → {len(written)} written, "
+          f"{files - len(written)} unchanged")
+    return written
+
+
+# ─── Palette variants (--variants) ─────────────────────────────────
+# Recolors ("skins") as PAL overrides per named variant. Each entity is drawn
+# once with PAL and once with every opaque PAL color swapped for an index code;
+# a variant is then one lookup-table gather over all of the entity's frames.
+VARIANTS = {
+    "player": {
+        "red": {"shirt": (220, 70, 60), "shirt_shadow": (170, 45, 40)},
+        "green": {"shirt": (70, 170, 90), "shirt_shadow": (45, 125, 65)},
+    },
+    "slime": {
+        "blue": {
+            "slime": (80, 150, 230), "slime_shadow": (50, 110, 190),
+            "slime_dark": (30, 75, 150), "slime_highlight": (150, 200, 250),
+        },
+        "red": {
+            "slime": (220, 80, 70), "slime_shadow": (175, 50, 45),
+            "slime_dark": (130, 30, 30), "slime_highlight": (250, 150, 140),
+        },
+    },
+    "coin": {
+        "silver": {
+            "gold": (200, 200, 210), "gold_light": (235, 235, 245),
+            "gold_shadow": (150, 150, 165), "gold_dark": (110, 110, 125),
+        },
+    },
+}
+
+
+@contextlib.contextmanager
+def indexed_palette():
+    """
+    Temporarily replace opaque PAL color i with the code (i % 256, i // 256, 0),
+    so a render records which palette entry each pixel came from. Yields the
+    PAL keys in index order. Codes are opaque like the colors they stand for,
+    so they composite the same way; translucent entries and literal colors
+    pass through unchanged.
+    """
+    saved = dict(PAL)
+    for i, key in enumerate(saved):
+        if rgba(saved[key])[3] == 255:
+            PAL[key] = (i & 0xFF, i >> 8, 0)
+    try:
+        yield list(saved)
+    finally:
+        PAL.update(saved)
+
+
+def render_indexed(entity: str) -> tuple:
+    """
+    Render every frame of `entity` as indices into a table of colors: once
+    with PAL and once with index codes. Pixels that differ between the two
+    came from a palette entry; the rest (literal colors, blends) keep their
+    rendered color. Returns (sprite names, (frames, h, w) index array,
+    [PAL key or None per index], (indices, 4) base RGBA table).
+    """
+    jobs = frame_jobs({entity: ENTITIES[entity]})
+    real = np.stack([np.asarray(render_frame(*job)) for job in jobs])
+    with indexed_palette() as keys:
+        coded = np.stack([np.asarray(render_frame(*job)) for job in jobs])
+    index = coded[..., 0].astype(np.int64) | coded[..., 1].astype(np.int64) << 8
+    from_pal = (
+        (coded != real).any(axis=-1) & (coded[..., 2] == 0) & (coded[..., 3] == 255)
+        & (index < len(keys))
+    )
+    # Palette pixels as 2^32 + index, the rest as their RGBA word, in one np.unique
+    words = np.where(
+        from_pal, (1 << 32) + index,
+        np.ascontiguousarray(real).view(np.uint32)[..., 0].astype(np.int64),
+    )
+    codes, inverse = np.unique(words, return_inverse=True)
+    pal_keys = [keys[code - (1 << 32)] if code >> 32 else None for code in codes.tolist()]
+    colors = np.array(
+        [rgba(PAL[key]) if key else tuple((code & 0xFFFFFFFF).to_bytes(4, sys.byteorder))
+         for key, code in zip(pal_keys, codes.tolist())],
+        dtype=np.uint8,
+    ).reshape(-1, 4)
+    names = [sprite_name(*job) for job in jobs]
+    return names, inverse.reshape(words.shape).astype(np.uint16), pal_keys, colors
+
+
+def variant_lut(pal_keys: list, colors: np.ndarray, overrides: dict) -> np.ndarray:
+    """The (indices, 4) color table for one variant: base colors with PAL overrides applied."""
+    unknown = set(overrides) - set(PAL)
+    if unknown:
+        raise ValueError(f"variant overrides unknown PAL entries: {', '.join(sorted(unknown))}")
+    lut = colors.copy()
+    for i, key in enumerate(pal_keys):
+        if key in overrides:
+            lut[i] = rgba(overrides[key])
+    return lut
+
+
+def variant_source(entity: str, overrides: dict) -> str:
+    """source_hash of the base entity, extended with a variant's overrides."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(source_hash(entity).encode())
+    h.update(repr(sorted(overrides.items())).encode())
+    return h.hexdigest()
+
+
+def generate_variants(variants: dict, known: dict = None, png: dict = None) -> tuple:
+    """
+    Write every variant in `variants` ({entity: {variant: PAL overrides}}) to
+    OUT_DIR/{entity}_{variant}/, skipping frames whose pixels are unchanged
+    (see store_frame). Returns ({sprite name: pixel hash}, {written name: sizes},
+    {output dir name: source hash}).
+    """
+    digests = {}
+    written = {}
+    sources = {}
+    for entity, palettes in variants.items():
+        names, indices, pal_keys, colors = render_indexed(entity)
+        for variant, overrides in palettes.items():
+            out_dir = f"{entity}_{variant}"
+            sources[out_dir] = variant_source(entity, overrides)
+            frames = variant_lut(pal_keys, colors, overrides)[indices]
+            for name, data in zip(names, frames):
+                out_name = f"{out_dir}/{name.split('/', 1)[1]}"
+                img = Image.fromarray(data)
+                digest = digests[out_name] = pixel_hash(img)
+                path = OUT_DIR / out_name
+                if known is None or not is_unchanged(path, digest, known.get(out_name)):
+                    if png and png.get("trim"):  # same alpha, so the entity's trim boxes
+                        img = trim_image(img)
+                    written[out_name] = write_png(path, img, png)
+        print(f"  🎭 {ENTITIES[entity]['label']} variants: {', '.join(palettes)} "
+              f"→ {OUT_DIR}/{entity}_{{variant}}/ ({len(names)} frames each)")
+    return digests, written, sources
+
+
+# ─── Contact Sheet ─────────────────────────────────────────────────
+# Rows = animations, columns = frames, each sprite scaled 4× for visibility.
+# The sheet is streamed to disk one row band at a time, so memory stays flat
+# however many sprites there are.
+SHEET_SCALE = 4
+SHEET_PADDING = 2
+SHEET_BG = (30, 30, 40, 255)
+
+
+def sheet_rows(all_sprites: dict):
+    """Yield contact sheet rows — (entity, anim, frames) — from rendered sprites."""
+    for entity, anims in all_sprites.items():
+        for anim, frames in anims.items():
+            yield entity, anim, frames
+
+
+def render_sheet_rows():
+    """Yield contact sheet rows for ENTITIES, rendering one animation at a time."""
+    for entity, spec in ENTITIES.items():
+        for anim, frame_count in spec["anims"].items():
+            yield entity, anim, [render_frame(entity, anim, f) for f in range(frame_count)]
+
+
+def sheet_layout(shapes: list) -> tuple:
+    """
+    Sheet geometry from one (frame count, (max w, max h)) per row, known before
+    any frame is rendered. Returns ((sheet w, sheet h), (cell w, cell h)).
+    """
+    max_frames = max(count for count, _ in shapes)
     # All sprites could be different sizes; use max dims
-    max_w = max(f.width for _, _, fl in rows for f in fl)
-    max_h = max(f.height for _, _, fl in rows for f in fl)
+    cell_w = max(w for _, (w, _) in shapes) * SHEET_SCALE + SHEET_PADDING
+    cell_h = max(h for _, (_, h) in shapes) * SHEET_SCALE + SHEET_PADDING
+    size = (max_frames * cell_w + SHEET_PADDING, len(shapes) * cell_h + SHEET_PADDING)
+    return size, (cell_w, cell_h)
 
-    cell_w = max_w * SCALE + PADDING
-    cell_h = max_h * SCALE + PADDING
 
-    sheet_w = max_frames * cell_w + PADDING
-    sheet_h = len(rows) * cell_h + PADDING
+def blend_bg(frames: list) -> np.ndarray:
+    """
+    Same-size frames stacked as (n, h, w, 4) and alpha-blended onto SHEET_BG
+    exactly as Image.paste(frame, box, mask=frame) would — opaque pixels out.
+    """
+    stack = np.stack([np.asarray(f) for f in frames])
+    # Pillow's BLEND: DIV255(bg * (255 - mask) + src * mask), mask = src alpha
+    mask = stack[..., 3:].astype(np.uint32)
+    blend = np.array(SHEET_BG, dtype=np.uint32) * (255 - mask) + stack * mask + 128
+    return ((blend + (blend >> 8)) >> 8).astype(np.uint8)
 
-    sheet = Image.new("RGBA", (sheet_w, sheet_h), (30, 30, 40, 255))
 
-    for row_i, (entity, anim_name, frame_list) in enumerate(rows):
-        for col_i, frame_img in enumerate(frame_list):
-            scaled = frame_img.resize(
-                (frame_img.width * SCALE, frame_img.height * SCALE),
-                Image.NEAREST,
-            )
-            x = PADDING + col_i * cell_w
-            y = PADDING + row_i * cell_h
-            sheet.paste(scaled, (x, y), scaled)
+def sheet_band(frames: list, sheet_w: int, cell_w: int, cell_h: int) -> np.ndarray:
+    """
+    One row of the sheet (cell_h × sheet_w): the row's frames blended onto
+    the background, then upscaled in a single np.repeat (blending first is
+    equivalent and touches SHEET_SCALE² fewer pixels).
+    """
+    blended = blend_bg(frames)
+    scaled = blended.repeat(SHEET_SCALE, axis=1).repeat(SHEET_SCALE, axis=2)
+    n, h, w, _ = scaled.shape
+    band = np.empty((cell_h, sheet_w, 4), dtype=np.uint8)
+    band[:] = SHEET_BG
+    cells = band[:h, SHEET_PADDING:SHEET_PADDING + n * cell_w].reshape(h, n, cell_w, 4)
+    cells[:, :, :w] = scaled.transpose(1, 0, 2, 3)
+    return band
+
+
+def generate_contact_sheet(sprites, known: str = None, force: bool = False,
+                           bands: dict = None) -> str:
+    """
+    Generate the review contact sheet at REVIEW_PATH.
+
+    `sprites` is either {entity: {anim: [Image, ...]}} or an iterable of
+    (entity, anim, frames) rows in ENTITIES order, e.g. render_sheet_rows() —
+    then no more than one animation's frames are ever held at once.
+
+    `known` is the sheet's pixel hash from the last run; unless `force`, the
+    PNG is only replaced when its pixels differ. `bands` (used by --watch) is
+    a cache of built and compressed rows keyed by their pixels, so only rows
+    that changed are redone; it holds every row, so leave it None for big sets.
+    Returns the new pixel hash.
+    """
+    if isinstance(sprites, dict):
+        shapes = [
+            (len(frames), (max(f.width for f in frames), max(f.height for f in frames)))
+            for _, _, frames in sheet_rows(sprites)
+        ]
+        rows = sheet_rows(sprites)
+    else:
+        shapes = [
+            (frame_count, spec["size"])
+            for spec in ENTITIES.values() for frame_count in spec["anims"].values()
+        ]
+        rows = sprites
+    if not shapes:
+        return None
+
+    (sheet_w, sheet_h), (cell_w, cell_h) = sheet_layout(shapes)
+    tmp_path = REVIEW_PATH.with_name(REVIEW_PATH.name + ".tmp")
+    with PngStream(tmp_path, sheet_w, sheet_h, cache=bands) as out:
+        out.write(np.full((SHEET_PADDING, sheet_w, 4), SHEET_BG, dtype=np.uint8))
+        for _, _, frames in rows:
+            if bands is None:
+                out.write(sheet_band(frames, sheet_w, cell_w, cell_h))
+                continue
+            key = (sheet_w, cell_w, cell_h, b"".join(f.tobytes() for f in frames))
+            if key not in bands:
+                bands[key] = sheet_band(frames, sheet_w, cell_w, cell_h)
+            out.write(bands[key])
+        out.close()
+
+    digest = out.digest
+    if not force and is_unchanged(REVIEW_PATH, digest, known):
+        tmp_path.unlink()
+        print(f"  📋 Contact sheet: {REVIEW_PATH} ({sheet_w}×{sheet_h}, unchanged)")
+    else:
+        os.replace(tmp_path, REVIEW_PATH)
+        print(f"  📋 Contact sheet: {REVIEW_PATH} ({sheet_w}×{sheet_h})")
+    return digest
+
+
+# ─── Scene wiring (--wire) ─────────────────────────────────────────
+# Rewrites the SpriteFrames sub-resources of scenes/*.tscn (and the texture
+# ext_resources they use) from ENTITIES, in one pass with no Godot round trip.
+# Animation order, names, speed, loop and per-frame durations, UIDs, ids of
+# existing resources and everything outside SpriteFrames are kept; a scene is
+# only rewritten when its text actually changes.
+HEADER_RE = re.compile(r"^\[(\w+)((?: \w+=(?:\"[^\"]*\"|\S+?))*)\]$")
+ATTR_RE = re.compile(r'(\w+)=("[^"]*"|[^ \]]+)')
+REF_RE = re.compile(r'(ExtResource|SubResource)\("([^"]*)"\)')
+
+
+def header_attrs(line: str) -> dict:
+    """Attributes of a section header line, e.g. {"type": "Texture2D", "id": "c_idle_0"}."""
+    match = HEADER_RE.match(line)
+    if not match:
+        return {}
+    return {key: value.strip('"') for key, value in ATTR_RE.findall(match.group(2))}
+
+
+def property_span(text: str, start: int) -> int:
+    """End index of the bracketed value starting at text[start]; skips over strings."""
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{(":
+            depth += 1
+        elif ch in "]})":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    raise ValueError("unbalanced value in scene file")
+
+
+def parse_animations(value: str) -> list:
+    """SpriteFrames `animations` value → list of dicts; textures stay as Godot text."""
+    value = REF_RE.sub(lambda m: json.dumps(m.group(0)), value)
+    return json.loads(value.replace('&"', '"'))
+
+
+def godot_float(value: float) -> str:
+    return repr(float(value))
+
+
+def godot_number(value: float) -> str:
+    """A number as Godot writes vector components: 8, -4.5."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def animations_text(animations: list) -> str:
+    """Godot's text form of a SpriteFrames `animations` value (inverse of parse_animations)."""
+    anims = []
+    for anim in animations:
+        frames = ", ".join(
+            f'{{\n"duration": {godot_float(frame["duration"])},\n"texture": {frame["texture"]}\n}}'
+            for frame in anim["frames"]
+        )
+        anims.append(
+            f'{{\n"frames": [{frames}],\n"loop": {json.dumps(anim["loop"])},\n'
+            f'"name": &{json.dumps(anim["name"])},\n"speed": {godot_float(anim["speed"])}\n}}'
+        )
+    return "[" + ", ".join(anims) + "]"
+
+
+def section_end(lines: list, start: int) -> int:
+    """Index after the last non-blank line of the section headed at lines[start]."""
+    end = start + 1
+    while end < len(lines) and not lines[end].startswith("["):
+        end += 1
+    while lines[end - 1] == "":
+        end -= 1
+    return end
+
+
+def atlas_texture_text(sub_id: str, ext_id: str, trim: dict) -> str:
+    """AtlasTexture section showing a trimmed frame at its untrimmed size and place."""
+    (x, y), (w, h), (source_w, source_h) = trim["offset"], trim["size"], trim["source_size"]
+    return (
+        f'[sub_resource type="AtlasTexture" id="{sub_id}"]\n'
+        f'atlas = ExtResource("{ext_id}")\n'
+        f"region = Rect2(0, 0, {w}, {h})\n"
+        f"margin = Rect2({x}, {y}, {source_w - w}, {source_h - h})"
+    )
+
+
+def place_atlas_textures(text: str, blocks: dict, roots: tuple, ext_paths: dict) -> tuple:
+    """
+    Sync a scene's AtlasTexture sub_resources with `blocks` ({SpriteFrames id:
+    {AtlasTexture id: section text}}): existing sections are updated in place,
+    new ones go right before the SpriteFrames using them, and those cropping
+    a texture under `roots` are dropped once nothing references them.
+    Returns (text, [SpriteFrames ids whose AtlasTextures changed]).
+    """
+    lines = text.split("\n")
+    sections = {  # sub_resource id → (first line, end line before trailing blanks)
+        header_attrs(line).get("id"): (i, section_end(lines, i))
+        for i, line in enumerate(lines) if line.startswith("[sub_resource")
+    }
+
+    changed = []
+    replace = {}  # first line → (line to resume at, new lines)
+    insert = {}  # line → sections to put before it
+    for frames_id, subs in blocks.items():
+        for sub_id, block in subs.items():
+            if sub_id not in sections:
+                insert.setdefault(sections[frames_id][0], []).extend(block.split("\n") + [""])
+            elif "\n".join(lines[slice(*sections[sub_id])]) != block:
+                replace[sections[sub_id][0]] = (sections[sub_id][1], block.split("\n"))
+            else:
+                continue
+            if frames_id not in changed:
+                changed.append(frames_id)
+
+    wanted = {sub_id for subs in blocks.values() for sub_id in subs}
+    referenced = set(re.findall(r'SubResource\("([^"]*)"\)', text))
+    for sub_id, (first, end) in sections.items():
+        atlas = re.fullmatch(r'atlas = ExtResource\("([^"]*)"\)', lines[first + 1]) if end > first + 1 else None
+        if (lines[first].startswith('[sub_resource type="AtlasTexture"') and atlas
+                and sub_id not in wanted and sub_id not in referenced
+                and ext_paths.get(atlas.group(1), "").startswith(roots)):
+            replace[first] = (end + 1 if end < len(lines) and lines[end] == "" else end, [])
+
+    out = []
+    i = 0
+    while i < len(lines):
+        out.extend(insert.get(i, []))
+        if i in replace:
+            i, new = replace[i]
+            out.extend(new)
+        else:
+            out.append(lines[i])
+            i += 1
+    return "\n".join(out), changed
+
+
+def wire_scene(text: str, aliases: dict = None, trims: dict = None) -> tuple:
+    """
+    Rewire every SpriteFrames in one .tscn text whose textures all come from
+    a single animated entity in OUT_DIR. Frames in `trims` (see trim_frames)
+    get an AtlasTexture restoring their untrimmed size and placement.
+    Returns (new text, [SpriteFrames ids changed]).
+    """
+    aliases = aliases or {}
+    trims = trims or {}
+    lines = text.split("\n")
+    resources = sum(line.startswith(("[ext_resource", "[sub_resource")) for line in lines)
+    ext = {}  # id → (line index, attrs)
+    for i, line in enumerate(lines):
+        if line.startswith("[ext_resource"):
+            attrs = header_attrs(line)
+            ext[attrs.get("id")] = (i, attrs)
+    by_path = {attrs.get("path"): ext_id for ext_id, (_, attrs) in ext.items()}
+    sprite_root = f"res://{OUT_DIR.as_posix()}/"
+    # AtlasTexture id → id of the ext_resource it crops (frames wired with --trim)
+    atlas_of = dict(re.findall(
+        r'^\[sub_resource type="AtlasTexture" id="([^"]*)"\]\natlas = ExtResource\("([^"]*)"\)',
+        text, re.M,
+    ))
+
+    changed = []
+    wanted = {}  # entity → [(ext id, path)] in ENTITIES order
+    atlas_textures = {}  # SpriteFrames id → {AtlasTexture id: section text}
+    pos = 0
+    while True:
+        match = re.search(r'^\[sub_resource type="SpriteFrames" id="([^"]*)"\]$', text[pos:], re.M)
+        if not match:
+            break
+        start = text.index("animations = ", pos + match.end()) + len("animations = ")
+        end = property_span(text, start)
+        pos = end
+        animations = parse_animations(text[start:end])
+        paths = {
+            ext[ext_id][1].get("path", "")
+            for anim in animations for frame in anim["frames"]
+            for kind, ref in REF_RE.findall(frame["texture"])
+            for ext_id in [ref if kind == "ExtResource" else atlas_of.get(ref)] if ext_id in ext
+        }
+        entities = {path[len(sprite_root):].split("/")[0] for path in paths if path.startswith(sprite_root)}
+        if len(entities) != 1 or len(paths) != sum(p.startswith(sprite_root) for p in paths):
+            continue
+        entity = entities.pop()
+        spec = ENTITIES.get(entity)
+        if spec is None or spec.get("single"):
+            continue
+
+        # Keep the scene's id prefix for new ext_resources (p_idle_0 → "p_")
+        prefix = f"{entity[0]}_"
+        for path in paths:
+            stem = path.rsplit("/", 1)[1][:-len(".png")]
+            if by_path[path].endswith(stem):
+                prefix = by_path[path][:-len(stem)]
+                break
+        refs = wanted.setdefault(entity, [])
+        subs = atlas_textures.setdefault(match.group(1), {})
+
+        def texture(anim_name: str, frame: int) -> str:
+            name = sprite_name(entity, anim_name, frame)
+            path = sprite_root + aliases.get(name, name)
+            ext_id = by_path.get(path)
+            if ext_id is None:
+                ext_id = prefix + path.rsplit("/", 1)[1][:-len(".png")]
+                while ext_id in ext:
+                    ext_id += "_"
+                by_path[path] = ext_id
+            if (ext_id, path) not in refs:
+                refs.append((ext_id, path))
+            trim = trims.get(aliases.get(name, name))
+            if trim is None:
+                return f'ExtResource("{ext_id}")'
+            sub_id = f"AtlasTexture_{ext_id}"
+            subs[sub_id] = atlas_texture_text(sub_id, ext_id, trim)
+            return f'SubResource("{sub_id}")'
+
+        present = {anim["name"] for anim in animations}
+        for anim_name in spec["anims"]:
+            if anim_name not in present:
+                animations.append({"frames": [], "loop": True, "name": anim_name, "speed": 5.0})
+        for anim in animations:
+            count = spec["anims"].get(anim["name"])
+            if count is None:
+                continue  # hand-made animation: left alone
+            old = anim["frames"]
+            anim["frames"] = [
+                {"duration": old[f]["duration"] if f < len(old) else 1.0,
+                 "texture": texture(anim["name"], f)}
+                for f in range(count)
+            ]
+        # ext_resources in ENTITIES order, not the scene's animation order
+        order = {sprite_root + sprite_name(entity, a, f): i
+                 for i, (a, f) in enumerate((a, f) for a, n in spec["anims"].items() for f in range(n))}
+        refs.sort(key=lambda ref: order.get(ref[1], len(order)))
+
+        new_value = animations_text(animations)
+        if new_value != text[start:end]:
+            text = text[:start] + new_value + text[end:]
+            pos = start + len(new_value)
+            changed.append(match.group(1))
+
+    ext_paths = {ext_id: attrs.get("path", "") for ext_id, (_, attrs) in ext.items()}
+    roots = tuple(f"{sprite_root}{entity}/" for entity in wanted)
+    text, retextured = place_atlas_textures(text, atlas_textures, roots, ext_paths)
+    changed += [frames_id for frames_id in retextured if frames_id not in changed]
+    if not changed:
+        return text, changed
+
+    # Replace each wired entity's texture ext_resources with the set now used,
+    # keeping existing lines (and their uids) verbatim and anything still
+    # referenced outside SpriteFrames.
+    lines = text.split("\n")
+    body = "\n".join(line for line in lines if not line.startswith("[ext_resource"))
+    referenced = set(re.findall(r'ExtResource\("([^"]*)"\)', body))
+    drop = set()
+    insert = {}
+    for entity, refs in wanted.items():
+        root = f"{sprite_root}{entity}/"
+        old = [(i, attrs) for i, attrs in ext.values()
+               if attrs.get("type") == "Texture2D" and attrs.get("path", "").startswith(root)]
+        keep = {path for _, path in refs}
+        block = [
+            lines[ext[ext_id][0]] if ext_id in ext and ext[ext_id][1].get("path") == path
+            else f'[ext_resource type="Texture2D" path="{path}" id="{ext_id}"]'
+            for ext_id, path in refs
+        ]
+        block += [lines[i] for i, attrs in old
+                  if attrs.get("path") not in keep and attrs.get("id") in referenced]
+        at = min((i for i, _ in old), default=max(i for i, _ in ext.values()) + 1)
+        drop.update(i for i, _ in old)
+        insert[at] = block
+    out = []
+    for i, line in enumerate(lines):
+        out.extend(insert.get(i, []))
+        if i not in drop:
+            out.append(line)
+    delta = sum(line.startswith(("[ext_resource", "[sub_resource")) for line in out) - resources
+    out[0] = re.sub(r"load_steps=(\d+)", lambda m: f"load_steps={int(m.group(1)) + delta}", out[0])
+    return "\n".join(out), changed
+
+
+def wire_scenes(aliases: dict = None, trims: dict = None) -> list:
+    """Rewire all scenes in SCENES_DIR; returns the paths rewritten."""
+    rewritten = []
+    scenes = sorted(SCENES_DIR.glob("*.tscn"))
+    for path in scenes:
+        text = path.read_text()
+        new_text, changed = wire_scene(text, aliases, trims)
+        if new_text != text:
+            path.write_text(new_text)
+            rewritten.append(path)
+            print(f"  🔌 Wired {path.as_posix()} ({', '.join(changed)})")
+    print(f"  🔌 Scenes: {len(scenes)} checked, {len(rewritten)} rewired")
+    return rewritten
+
+
+def remove_stale_aliases(aliases: dict) -> list:
+    """Delete --dedupe alias PNGs left by earlier runs once no scene references them."""
+    scene_text = "\n".join(path.read_text() for path in SCENES_DIR.glob("*.tscn"))
+    removed = []
+    for name in aliases:
+        path = OUT_DIR / name
+        if path.exists() and f"res://{path.as_posix()}" not in scene_text:
+            path.unlink()
+            removed.append(path)
+    if removed:
+        print(f"  🧹 Removed {len(removed)} duplicate frames no scene references any more")
+    return removed
+
+
+def node_vector(lines: list, start: int, prop: str) -> tuple:
+    """A Vector2 property of the node section at lines[start] as (x, y); (0, 0) if unset."""
+    for line in lines[start + 1:section_end(lines, start)]:
+        match = re.fullmatch(rf"{prop} = Vector2\(([^,]+), ([^)]+)\)", line)
+        if match:
+            return float(match.group(1)), float(match.group(2))
+    return 0.0, 0.0
+
+
+def wire_collision(text: str, entity: str, polygon: tuple) -> str:
+    """
+    Point the root CollisionShape2D of a scene at ConvexPolygonShape2D_{entity}
+    holding `polygon` (see alpha_polygon), moved from the AnimatedSprite2D's
+    frame into the shape node's space. The shape it replaces is dropped once
+    nothing references it. Scenes without both nodes come back unchanged.
+    """
+    lines = text.split("\n")
+    nodes = {}  # type → first line of the root's first child of that type
+    for i, line in enumerate(lines):
+        attrs = header_attrs(line) if line.startswith("[node") else {}
+        if attrs.get("parent") == ".":
+            nodes.setdefault(attrs.get("type"), i)
+    if "CollisionShape2D" not in nodes or "AnimatedSprite2D" not in nodes:
+        return text
+    shape_node, sprite_node = nodes["CollisionShape2D"], nodes["AnimatedSprite2D"]
+    (sx, sy), (ox, oy) = (node_vector(lines, sprite_node, prop) for prop in ("position", "offset"))
+    cx, cy = node_vector(lines, shape_node, "position")
+    shift = (sx + ox - cx, sy + oy - cy)
+    points = ", ".join(godot_number(v + shift[i % 2]) for i, v in enumerate(polygon))
+    sub_id = f"ConvexPolygonShape2D_{entity}"
+    block = [f'[sub_resource type="ConvexPolygonShape2D" id="{sub_id}"]',
+             f"points = PackedVector2Array({points})"]
+    sections = {
+        header_attrs(line).get("id"): i
+        for i, line in enumerate(lines) if line.startswith("[sub_resource")
+    }
+    if sub_id in sections:
+        start = sections[sub_id]
+        lines[start:section_end(lines, start)] = block
+        return "\n".join(lines)
+
+    # Repoint the node, then put the new shape where the old one was
+    body = range(shape_node + 1, section_end(lines, shape_node))
+    shape_line = next((i for i in body if lines[i].startswith("shape = ")), None)
+    old = re.fullmatch(r'shape = SubResource\("([^"]*)"\)', lines[shape_line] if shape_line is not None else "")
+    old_id = old.group(1) if old else None
+    if shape_line is None:
+        lines.insert(body.stop, f'shape = SubResource("{sub_id}")')
+    else:
+        lines[shape_line] = f'shape = SubResource("{sub_id}")'
+    at = sections.get(old_id, min(i for i, line in enumerate(lines) if line.startswith("[node")))
+    added = 1
+    if old_id in sections and f'SubResource("{old_id}")' not in "\n".join(lines):
+        end = section_end(lines, at)
+        del lines[at:end + 1 if end < len(lines) and lines[end] == "" else end]
+        added = 0
+    lines[at:at] = block + [""]
+    lines[0] = re.sub(r"load_steps=(\d+)", lambda m: f"load_steps={int(m.group(1)) + added}", lines[0])
+    return "\n".join(lines)
+
+
+def wire_collision_shapes(all_sprites: dict) -> list:
+    """
+    Give the scenes of every entity with a "collision" animation in ENTITIES a
+    convex shape traced from that animation's frames; returns the paths rewritten.
+    """
+    sprite_root = f"res://{OUT_DIR.as_posix()}/"
+    polygons = {
+        entity: alpha_polygon(all_sprites[entity][spec["collision"]], BODY_VERTICES, convex=True)
+        for entity, spec in ENTITIES.items() if "collision" in spec
+    }
+    rewritten = []
+    for path in sorted(SCENES_DIR.glob("*.tscn")):
+        text = new_text = path.read_text()
+        for entity, polygon in polygons.items():
+            if polygon is not None and f'path="{sprite_root}{entity}/' in new_text:
+                new_text = wire_collision(new_text, entity, polygon)
+        if new_text != text:
+            path.write_text(new_text)
+            rewritten.append(path)
+            print(f"  🔷 Collision shape: {path.as_posix()}")
+    print(f"  🔷 Collision: {len(polygons)} traced shapes, {len(rewritten)} scenes updated")
+    return rewritten
+
+
+# ─── Animated previews (--preview) ─────────────────────────────────
+# One looping preview per animation at its in-game speed, plus all{ext} with
+# every animation side by side, so reviewers see motion, not frame strips.
+# Frames are blended onto SHEET_BG like the contact sheet and quantized in a
+# single pass — one np.unique over every frame gives the shared palette, in
+# PAL order — so each preview is just slices of one index array.
+PREVIEW_DIR = Path("sprites-preview")
+PREVIEW_FORMATS = {"gif": ("GIF", ".gif"), "apng": ("PNG", ".png"), "webp": ("WEBP", ".webp")}
+PREVIEW_SPEED = 5.0  # FPS of animations no scene plays yet (what --wire gives them)
+PREVIEW_MAX_CYCLE = 4000  # ms; the combined preview loops after this at the latest
+
+
+def scene_speeds() -> dict:
+    """
+    {(entity, anim): (speed, [relative frame durations])} for every animation
+    a SpriteFrames in SCENES_DIR plays from OUT_DIR (first scene wins).
+    """
+    sprite_root = f"res://{OUT_DIR.as_posix()}/"
+    speeds = {}
+    for path in sorted(SCENES_DIR.glob("*.tscn")):
+        text = path.read_text()
+        ext = {
+            attrs.get("id"): attrs.get("path", "")
+            for attrs in map(header_attrs, text.split("\n")) if attrs.get("path")
+        }
+        for match in re.finditer(r'^\[sub_resource type="SpriteFrames" id="[^"]*"\]$', text, re.M):
+            start = text.index("animations = ", match.end()) + len("animations = ")
+            for anim in parse_animations(text[start:property_span(text, start)]):
+                paths = [
+                    ext.get(ref, "") for frame in anim["frames"]
+                    for kind, ref in REF_RE.findall(frame["texture"]) if kind == "ExtResource"
+                ]
+                if anim["speed"] > 0 and paths and paths[0].startswith(sprite_root):
+                    entity = paths[0][len(sprite_root):].split("/")[0]
+                    speeds.setdefault(
+                        (entity, anim["name"]),
+                        (anim["speed"], [frame["duration"] for frame in anim["frames"]]),
+                    )
+    return speeds
+
+
+def preview_durations(key: tuple, frame_count: int, speeds: dict, fps: float = None) -> list:
+    """
+    Milliseconds per frame of one animation: its scene speed (or `fps`), in
+    GIF's 10 ms ticks and at least 20 ms — browsers slow down faster frames.
+    """
+    speed, durations = speeds.get(key, (PREVIEW_SPEED, []))
+    if len(durations) != frame_count:
+        durations = [1.0] * frame_count
+    return [max(20, round(1000 / (fps or speed) * d / 10) * 10) for d in durations]
+
+
+def quantize_previews(all_sprites: dict) -> tuple:
+    """
+    Blend every animation's frames onto SHEET_BG and index them all against
+    one palette. Returns (palette as (n, 3) uint8, background index,
+    {(entity, anim): (frames, h, w) uint8 indices}).
+    """
+    blended = {
+        (entity, anim): blend_bg(frames)
+        for entity, anims in all_sprites.items() if not ENTITIES[entity].get("single")
+        for anim, frames in anims.items()
+    }
+    for stack in blended.values():
+        stack[..., 3] = 255  # the sheet keeps blended alpha; previews are opaque
+    bg = np.array(SHEET_BG, dtype=np.uint8).view("<u4")
+    packed = np.concatenate([bg] + [stack.view("<u4").ravel() for stack in blended.values()])
+    colors, inverse = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        raise ValueError(f"previews need {len(colors)} colors; a GIF palette holds 256")
+    palette, remap = palette_order(colors)
+    indices = remap[inverse]
+
+    indexed = {}
+    pos = 1
+    for key, stack in blended.items():
+        size = stack.shape[0] * stack.shape[1] * stack.shape[2]
+        indexed[key] = indices[pos:pos + size].reshape(stack.shape[:3])
+        pos += size
+    return palette[:, :3], int(indices[0]), indexed
+
+
+def combined_preview(indexed: dict, durations: dict, background: int, scale: int) -> tuple:
+    """
+    All animations in one grid — a row per entity, a cell per animation, each
+    at its own speed — over a cycle that is the LCM of their loop lengths
+    (capped at PREVIEW_MAX_CYCLE), cut at every frame change.
+    Returns (frames as (n, H, W) indices, [ms per frame]).
+    """
+    cells = {}  # key → (x, y) of its cell
+    row_y = SHEET_PADDING
+    cell_w = max(frames.shape[2] for frames in indexed.values()) * scale + SHEET_PADDING
+    for entity in dict.fromkeys(entity for entity, _ in indexed):
+        row = [key for key in indexed if key[0] == entity]
+        for col, key in enumerate(row):
+            cells[key] = (SHEET_PADDING + col * cell_w, row_y)
+        row_y += max(indexed[key].shape[1] for key in row) * scale + SHEET_PADDING
+    width = max(x for x, _ in cells.values()) + cell_w
+    height = row_y
+
+    ends = {key: np.cumsum(ms) for key, ms in durations.items()}
+    cycle = min(math.lcm(*(int(end[-1]) for end in ends.values())), PREVIEW_MAX_CYCLE)
+    cuts = np.unique(np.concatenate([
+        (np.concatenate([[0], end[:-1]]) + end[-1] * np.arange(-(-cycle // end[-1]))[:, None]).ravel()
+        for end in ends.values()
+    ]))
+    cuts = cuts[cuts < cycle]
+
+    out = np.full((len(cuts), height, width), background, dtype=np.uint8)
+    for key, frames in indexed.items():
+        # Which frame of this animation is showing at each cut, as one gather
+        shown = np.searchsorted(ends[key], cuts % ends[key][-1], side="right")
+        scaled = frames.repeat(scale, axis=1).repeat(scale, axis=2)
+        x, y = cells[key]
+        out[:, y:y + scaled.shape[1], x:x + scaled.shape[2]] = scaled[shown]
+    return out, np.diff(np.append(cuts, cycle)).tolist()
+
+
+def encode_animation(frames: np.ndarray, durations: list, palette: np.ndarray, fmt: str) -> bytes:
+    """Encode (n, h, w) palette indices as a looping GIF, APNG or lossless WebP."""
+    images = []
+    for frame in frames:
+        img = Image.frombytes("P", (frame.shape[1], frame.shape[0]), frame.tobytes())
+        img.putpalette(palette.tobytes())
+        images.append(img)
+    options = {"GIF": {"optimize": False}, "WEBP": {"lossless": True}}.get(PREVIEW_FORMATS[fmt][0], {})
+    buf = io.BytesIO()
+    images[0].save(
+        buf, PREVIEW_FORMATS[fmt][0], save_all=True, append_images=images[1:],
+        duration=durations, loop=0, **options,
+    )
+    return buf.getvalue()
+
+
+def generate_previews(all_sprites: dict, fmt: str = "gif", scale: int = SHEET_SCALE,
+                      fps: float = None) -> dict:
+    """
+    Write PREVIEW_DIR/{entity}_{anim}{ext} for every animation plus the
+    combined all{ext}, at `scale`× and the speeds the scenes play them at
+    (`fps` overrides). Files whose bytes are unchanged are left alone and
+    stale previews of this format removed. Returns {written path: bytes}.
+    """
+    palette, background, indexed = quantize_previews(all_sprites)
+    speeds = scene_speeds()
+    durations = {
+        key: preview_durations(key, len(frames), speeds, fps) for key, frames in indexed.items()
+    }
+    PREVIEW_DIR.mkdir(exist_ok=True)
+    (PREVIEW_DIR / ".gdignore").touch()  # review output: keep Godot from importing it
+    ext = PREVIEW_FORMATS[fmt][1]
+
+    written = {}
+    kept = set()
+
+    def save(path: Path, frames: np.ndarray, ms: list):
+        data = encode_animation(frames, ms, palette, fmt)
+        kept.add(path)
+        if not path.exists() or path.read_bytes() != data:
+            path.write_bytes(data)
+            written[str(path)] = len(data)
+
+    for (entity, anim), frames in indexed.items():
+        scaled = frames.repeat(scale, axis=1).repeat(scale, axis=2)
+        save(PREVIEW_DIR / f"{entity}_{anim}{ext}", scaled, durations[entity, anim])
+    combined, ms = combined_preview(indexed, durations, background, scale)
+    save(PREVIEW_DIR / f"all{ext}", combined, ms)
+    for path in PREVIEW_DIR.glob(f"*{ext}"):
+        if path not in kept:
+            path.unlink()
+
+    print(f"  🎞️  Previews: {PREVIEW_DIR}/ ({len(indexed)} animations + all{ext}, "
+          f"{len(palette)} colors, {len(written)} written)")
+    return written
+
+
+# ─── Godot import sidecars (--import-sidecars) ─────────────────────
+# Writes the {name}.png.import file Godot would create for every PNG under
+# OUT_DIR (and the _{n}x / _mip{level} sets), with pixel-art settings —
+# lossless, no mipmaps, never VRAM-compressed — so a fresh import needs no
+# editor round trip and nothing is imported with the wrong defaults. Filtering
+# isn't an import setting in Godot 4; the scenes' texture_filter handles it.
+# A sidecar keeps the UID it already has (as Godot does); a new one gets a UID
+# from the content hash. Godot re-imports a texture when its source md5 differs
+# from the one stored in .godot/imported/, so that comparison gives the exact
+# list of files the next import will touch.
+GODOT_IMPORTED = Path(".godot/imported")
+UID_CHARS = "abcdefghijklmnopqrstuvwxy012345678"  # ResourceUID::id_to_text's base 34
+IMPORT_PARAMS = {
+    "compress/mode": "0",  # lossless
+    "compress/high_quality": "false",
+    "compress/lossy_quality": "0.7",
+    "compress/hdr_compression": "1",
+    "compress/normal_map": "0",
+    "compress/channel_pack": "0",
+    "mipmaps/generate": "false",
+    "mipmaps/limit": "-1",
+    "roughness/mode": "0",
+    "roughness/src_normal": '""',
+    "process/fix_alpha_border": "true",
+    "process/premult_alpha": "false",
+    "process/normal_map_invert_y": "false",
+    "process/hdr_as_srgb": "false",
+    "process/hdr_clamp_exposure": "false",
+    "process/size_limit": "0",
+    "detect_3d/compress_to": "0",  # keep lossless even if a 3D scene uses it
+}
+
+
+def godot_uid(data: bytes) -> str:
+    """A uid:// in Godot's text form for a 63-bit id taken from the SHA-256 of `data`."""
+    value = int.from_bytes(hashlib.sha256(data).digest()[:8], "big") & ((1 << 63) - 1)
+    text = ""
+    while value:
+        value, digit = divmod(value, len(UID_CHARS))
+        text = UID_CHARS[digit] + text
+    return f"uid://{text}"
+
+
+def imported_path(res_path: str) -> str:
+    """Where Godot caches the imported texture: {file}-{md5 of the res:// path}.ctex."""
+    name = res_path.rsplit("/", 1)[-1]
+    return f"res://{GODOT_IMPORTED.as_posix()}/{name}-{hashlib.md5(res_path.encode()).hexdigest()}.ctex"
+
 
-    sheet.save(REVIEW_PATH)
-    print(f"  📋 Contact sheet: {REVIEW_PATH} ({sheet_w}×{sheet_h})")
+def import_text(res_path: str, uid: str) -> str:
+    """The .import sidecar Godot 4.3 writes for a 2D texture with IMPORT_PARAMS."""
+    dest = imported_path(res_path)
+    params = "\n".join(f"{key}={value}" for key, value in IMPORT_PARAMS.items())
+    return (
+        f'[remap]\n\nimporter="texture"\ntype="CompressedTexture2D"\nuid="{uid}"\npath="{dest}"\n'
+        f'metadata={{\n"vram_texture": false\n}}\n\n'
+        f'[deps]\n\nsource_file="{res_path}"\ndest_files=["{dest}"]\n\n'
+        f"[params]\n\n{params}\n"
+    )
+
+
+def needs_reimport(res_path: str, data: bytes) -> bool:
+    """True unless .godot/imported/ holds an import of exactly these bytes."""
+    stamp = Path(imported_path(res_path).removeprefix("res://")).with_suffix(".md5")
+    if not stamp.exists():
+        return True
+    match = re.search(r'^source_md5="([0-9a-f]*)"', stamp.read_text(), re.M)
+    return not match or match.group(1) != hashlib.md5(data).hexdigest()
+
+
+def write_import_sidecars() -> list:
+    """
+    Write or refresh the sidecar of every sprite PNG and delete sidecars whose
+    PNG is gone. Returns the PNG paths Godot will re-import.
+    """
+    roots = [OUT_DIR, *sorted(OUT_DIR.parent.glob(f"{OUT_DIR.name}_*"))]
+    written, reimport, total = 0, [], 0
+    for root in roots:
+        for path in sorted(root.rglob("*.png")):
+            res_path = f"res://{path.as_posix()}"
+            data = path.read_bytes()
+            sidecar = path.with_name(path.name + ".import")
+            old = sidecar.read_text() if sidecar.exists() else ""
+            match = re.search(r'^uid="(uid://[a-y0-8]+)"', old, re.M)
+            text = import_text(res_path, match.group(1) if match else godot_uid(res_path.encode() + data))
+            if text != old:
+                sidecar.write_text(text)
+                written += 1
+            if text != old or needs_reimport(res_path, data):
+                reimport.append(path)
+            total += 1
+        for sidecar in root.rglob("*.png.import"):
+            if not sidecar.with_suffix("").exists():
+                sidecar.unlink()
+
+    print(f"  📥 {total} import sidecars ({written} written)")
+    if not GODOT_IMPORTED.exists():
+        print(f"     No {GODOT_IMPORTED}/ yet — the first import covers all {len(reimport)} textures")
+    elif reimport:
+        print(f"     {len(reimport)} to re-import: " + ", ".join(p.as_posix() for p in reimport))
+    else:
+        print("     Nothing to re-import")
+    return reimport
+
+
+# ─── Asset budget (--report) ───────────────────────────────────────
+# What the HTML5 export will load, without decoding a pixel: on-disk bytes,
+# decoded RGBA memory (width·height·4, read from each PNG's IHDR) and request
+# count (one per texture file) for every entity directory under OUT_DIR and
+# every scene, following instanced scenes and .tres resources such as the
+# tileset. Palette variants ({entity}_{variant}/) and atlases are reported as
+# their own kinds so they don't count against the entity they come from, and
+# the total is what the scenes load between them, each texture once. Totals
+# are checked against BUDGET_PATH — limits per kind ("entity", "variant",
+# "atlas", "scene", "total"), optionally overridden per name
+# ("scene:level_2") — and any overrun exits 1, so the report can gate an export.
+BUDGET_PATH = Path("sprites-budget.json")
+BUDGET_METRICS = ("bytes", "decoded", "requests")
+BUDGET_KINDS = ("entity", "variant", "atlas", "scene", "total")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def parse_budget(text: str) -> tuple:
+    """Parse --budget: `scene:level_2.requests=80` → ("scene:level_2", "requests", 80.0)."""
+    key, _, value = text.partition("=")
+    kind, _, metric = key.rpartition(".")
+    if kind.split(":")[0] not in BUDGET_KINDS or metric not in BUDGET_METRICS:
+        raise ValueError(
+            f"expected KIND[:NAME].METRIC=VALUE with KIND {'/'.join(BUDGET_KINDS)} and "
+            f"METRIC {'/'.join(BUDGET_METRICS)}, not {text!r}"
+        )
+    try:
+        return kind, metric, float(value)
+    except ValueError:
+        raise ValueError(f"{key} needs a number, not {value!r}") from None
+
+
+def png_dimensions(path: Path) -> tuple:
+    """(width, height) from the IHDR chunk — the first 24 bytes of the file."""
+    with open(path, "rb") as f:
+        head = f.read(24)
+    if head[:8] != PNG_SIGNATURE or head[12:16] != b"IHDR":
+        raise ValueError(f"{path} is not a PNG")
+    return struct.unpack(">II", head[16:24])
+
+
+def texture_cost(path: Path) -> tuple:
+    """(bytes on disk, decoded RGBA bytes) of one PNG."""
+    width, height = png_dimensions(path)
+    return path.stat().st_size, width * height * 4
+
+
+def resource_textures(res_path: str, seen: dict) -> set:
+    """
+    res:// paths of every PNG loading `res_path` pulls in: its own ext_resources
+    plus, recursively, those of the scenes and resources it references.
+    """
+    if res_path in seen:
+        return seen[res_path]
+    seen[res_path] = textures = set()  # placeholder: cycles end here
+    path = Path(res_path.removeprefix("res://"))
+    if not path.exists():
+        return textures
+    for attrs in map(header_attrs, path.read_text().split("\n")):
+        ref = attrs.get("path", "") if attrs.get("id") else ""
+        if ref.endswith(".png"):
+            textures.add(ref)
+        elif ref.endswith((".tscn", ".tres")):
+            textures |= resource_textures(ref, seen)
+    return textures
+
+
+def output_group(path: Path) -> tuple:
+    """(kind, name) of a PNG under OUT_DIR: its entity, palette variant or atlas."""
+    if path.parent == ATLAS_DIR:
+        return "atlas", path.stem
+    top = path.relative_to(OUT_DIR).parts[0]
+    return ("entity" if top in ENTITIES else "variant"), top
+
+
+def asset_totals(paths: list, costs: dict) -> dict:
+    return {
+        "bytes": sum(costs[p][0] for p in paths),
+        "decoded": sum(costs[p][1] for p in paths),
+        "requests": len(paths),
+    }
+
+
+def budget_limits(budgets: dict, kind: str, name: str = None) -> dict:
+    return {**budgets.get(kind, {}), **budgets.get(f"{kind}:{name}", {})}
+
+
+def asset_report(overrides: list = ()) -> int:
+    """Print the asset size / load report and check it against the budgets. Returns an exit code."""
+    start = time.perf_counter()
+    budgets = json.loads(BUDGET_PATH.read_text()) if BUDGET_PATH.exists() else {}
+    for key, metric, value in overrides:
+        budgets.setdefault(key, {})[metric] = value
+
+    costs, groups = {}, {}
+    for path in sorted(OUT_DIR.rglob("*.png")):
+        res_path = f"res://{path.as_posix()}"
+        costs[res_path] = texture_cost(path)
+        groups.setdefault(output_group(path), []).append(res_path)
+    seen, scenes, missing = {}, {}, set()
+    for path in sorted(SCENES_DIR.glob("*.tscn")):
+        textures = sorted(resource_textures(f"res://{path.as_posix()}", seen))
+        for res_path in textures:
+            local = Path(res_path.removeprefix("res://"))
+            if res_path not in costs and local.exists():
+                costs[res_path] = texture_cost(local)
+        missing.update(p for p in textures if p not in costs)
+        scenes[path.stem] = [p for p in textures if p in costs]
+
+    rows = [
+        (kind, name, groups[kind, name])
+        for kind in ("entity", "variant", "atlas")
+        for group_kind, name in groups if group_kind == kind
+    ]
+    rows += [("scene", name, paths) for name, paths in scenes.items()]
+    rows.append(("total", "scenes", sorted({p for paths in scenes.values() for p in paths})))
+    over = 0
+    print(f"  📏 Asset budget ({BUDGET_PATH if BUDGET_PATH.exists() else f'no {BUDGET_PATH}'})")
+    print(f"     {'':<7} {'name':<20} {'requests':>8} {'bytes':>10} {'decoded':>10}")
+    for kind, name, paths in rows:
+        totals = asset_totals(paths, costs)
+        limits = budget_limits(budgets, kind, name)
+        exceeded = [
+            f"{metric} over {limits[metric]:,g}"
+            for metric in BUDGET_METRICS if metric in limits and totals[metric] > limits[metric]
+        ]
+        over += bool(exceeded)
+        print(f"  {'❌' if exceeded else '  '} {kind:<7} {name:<20} {totals['requests']:>8} "
+              f"{totals['bytes']:>10,} {totals['decoded']:>10,}"
+              + (f"  ({', '.join(exceeded)})" if exceeded else ""))
+    for res_path in sorted(missing):
+        print(f"  ⚠️  {res_path} is referenced by a scene but missing")
+
+    elapsed = (time.perf_counter() - start) * 1000
+    if over:
+        print(f"  ❌ {over} budget(s) exceeded ({elapsed:.0f} ms)")
+        return 1
+    print(f"  ✅ Within budget: {len(costs)} textures, {len(scenes)} scenes ({elapsed:.0f} ms)")
+    return 0
+
+
+# ─── Golden check (--check) ────────────────────────────────────────
+# Regression guard for refactors of the draw functions and primitives: every
+# frame is rendered in memory (nothing under assets/ is written) and its pixel
+# hash compared with sprites-golden.json. A mismatch gets a diff image in
+# sprites-check/ — the committed PNG, the new render and the changed pixels in
+# magenta — and its changed-pixel count. --update-golden accepts the new art.
+GOLDEN_PATH = Path("sprites-golden.json")
+CHECK_DIR = Path("sprites-check")
+DIFF_COLOR = (255, 0, 255)
+
+
+def diff_image(reference: np.ndarray, current: np.ndarray) -> tuple:
+    """
+    (Image, changed pixel count) for two RGBA frames: reference | current |
+    current dimmed with changed pixels in DIFF_COLOR, on SHEET_BG at SHEET_SCALE.
+    Frames of different sizes are compared over the larger one.
+    """
+    h, w = max(reference.shape[0], current.shape[0]), max(reference.shape[1], current.shape[1])
+    ref, cur = (np.pad(a, ((0, h - a.shape[0]), (0, w - a.shape[1]), (0, 0))) for a in (reference, current))
+    changed = (ref != cur).any(axis=-1)
+    ref, cur = blend_bg([ref, cur])
+    diff = cur.copy()
+    diff[..., :3] //= 3
+    diff[changed, :3] = DIFF_COLOR
+    gap = np.full((h, SHEET_PADDING, 4), SHEET_BG, dtype=np.uint8)
+    row = np.concatenate([ref, gap, cur, gap, diff], axis=1)
+    return Image.fromarray(row.repeat(SHEET_SCALE, axis=0).repeat(SHEET_SCALE, axis=1)), int(changed.sum())
+
+
+def check_golden(update: bool = False) -> int:
+    """Render every frame in memory and compare with GOLDEN_PATH (or rewrite it). Returns an exit code."""
+    start = time.perf_counter()
+    frames = {sprite_name(*job): render_frame(*job) for job in frame_jobs()}
+    digests = {name: pixel_hash(img) for name, img in frames.items()}
+    if update:
+        GOLDEN_PATH.write_text(json_text(digests) + "\n")
+        print(f"  🏅 Golden hashes for {len(digests)} frames → {GOLDEN_PATH}")
+        return 0
+    if not GOLDEN_PATH.exists():
+        print(f"  ❌ No {GOLDEN_PATH} — run with --update-golden to create it")
+        return 1
+
+    golden = json.loads(GOLDEN_PATH.read_text())
+    mismatched = [name for name, digest in digests.items() if golden.get(name) != digest]
+    missing = [name for name in golden if name not in digests]
+    for path in CHECK_DIR.glob("**/*.png"):
+        path.unlink()  # diffs of an earlier check
+    for name in mismatched:
+        current = np.asarray(frames[name])
+        reference = np.zeros((0, 0, 4), dtype=np.uint8)
+        source = OUT_DIR / name
+        if source.exists() and name in golden:
+            with Image.open(source) as img:
+                if pixel_hash(img.convert("RGBA")) == golden[name]:
+                    reference = np.asarray(img.convert("RGBA"))
+        image, count = diff_image(reference, current)
+        path = CHECK_DIR / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        image.save(path)
+        status = "new frame" if name not in golden else (
+            f"{count} px changed" if reference.size else f"no {source} matching the golden hash"
+        )
+        print(f"  ❌ {name}: {status} → {path}")
+    for name in missing:
+        print(f"  ❌ {name}: in {GOLDEN_PATH} but no longer rendered")
+
+    elapsed = (time.perf_counter() - start) * 1000
+    if mismatched or missing:
+        (CHECK_DIR / ".gdignore").touch()
+        print(f"  ❌ {len(mismatched) + len(missing)} of {len(golden)} golden frames differ "
+              f"({elapsed:.0f} ms) — --update-golden if the change is intended")
+        return 1
+    print(f"  ✅ {len(digests)} frames match {GOLDEN_PATH} ({elapsed:.0f} ms)")
+    return 0
+
+
+# ─── Watch mode (--watch) ──────────────────────────────────────────
+# After a normal run the process stays up and polls this file and sprites.json.
+# On a save of either this file is re-executed into a fresh module (Pillow and
+# NumPy stay imported), and the new module's rebuild() re-renders only
+# entities whose source_hash (code, palette entries and spec) changed, then
+# refreshes the contact sheet from cached row bands. Serial only: the
+# re-executed module can't be pickled into worker processes.
+WATCH_INTERVAL = 0.02  # seconds between mtime polls
+
+
+def stage_hashes() -> dict:
+    """stage_hash of each non-entity stage rebuild() may have to re-run."""
+    return {
+        "tileset": stage_hash(generate_tileset, TILES, TILE_DETAILS),
+        "contact sheet": stage_hash(generate_contact_sheet),
+        "variants": stage_hash(generate_variants),
+        "previews": stage_hash(generate_previews),
+    }
+
+
+def watch_state(args: argparse.Namespace) -> dict:
+    """What rebuild() diffs against: every frame in memory plus the code hashes behind them."""
+    manifest = load_manifest()
+    resolve_trim(args, report=False)
+    known = {name: entry["pixels"] for name, entry in manifest.get("frames", {}).items()}
+    all_sprites, _, _, aliases = render_all(frame_jobs(), 1, known, png_options(args), args.dedupe)
+    bands = {}
+    with contextlib.redirect_stdout(io.StringIO()):  # warms the band cache; already reported
+        generate_contact_sheet(all_sprites, manifest.get("contact_sheet"), bands=bands)
+    return {
+        "sprites": all_sprites,
+        "aliases": aliases,
+        "sources": {entity: source_hash(entity) for entity in ENTITIES},
+        "variants": {entity: repr(VARIANTS.get(entity)) for entity in ENTITIES},
+        "stages": stage_hashes(),
+        "bands": bands,
+    }
+
+
+def rebuild(state: dict, args: argparse.Namespace) -> tuple:
+    """
+    Regenerate what changed since `state` (updated in place) with this
+    module's code: frames of changed entities, then the tileset, variants,
+    contact sheet, atlases, scene wiring and manifest as needed.
+    Returns ([changed entities], {written name: sizes}).
+    """
+    manifest = load_manifest()
+    resolve_trim(args, report=False)
+    png = png_options(args)
+    frames = manifest.get("frames", {})
+    known = {name: entry["pixels"] for name, entry in frames.items()}
+    sources = {entity: source_hash(entity) for entity in ENTITIES}
+    stages = stage_hashes()
+    changed = [entity for entity in ENTITIES if state["sources"].get(entity) != sources[entity]]
+
+    sprites, digests, written, aliases = render_all(
+        frame_jobs({entity: ENTITIES[entity] for entity in changed}), 1, known, png, args.dedupe
+    )
+    all_sprites = {entity: sprites.get(entity) or state["sprites"][entity] for entity in ENTITIES}
+    aliases.update(
+        (name, canonical) for name, canonical in state["aliases"].items()
+        if name.split("/")[0] not in changed
+    )
+    aliases = {
+        name: aliases[name] for name in map(lambda job: sprite_name(*job), frame_jobs())
+        if name in aliases
+    }
+    if args.dedupe:
+        save_aliases(aliases)
+    trims = trim_frames(all_sprites, aliases) if args.trim else {}
+    if args.trim:
+        save_trims(trims)
+
+    if "tiles" in changed or stages["tileset"] != state["stages"]["tileset"]:
+        written.update(generate_tileset(
+            all_sprites["tiles"], False, png, args.tile_variants, args.tile_seed
+        ))
+    if (args.scales or args.mips) and changed:
+        written.update(generate_resolutions(
+            {entity: all_sprites[entity] for entity in changed}, args.scales or [], args.mips,
+            {name for name, digest in digests.items() if known.get(name) == digest}, png,
+        ))
+    variant_sources = {}
+    if args.variants:
+        redo = {
+            entity: palettes for entity, palettes in VARIANTS.items()
+            if entity in changed or repr(palettes) != state["variants"].get(entity)
+            or stages["variants"] != state["stages"]["variants"]
+        }
+        if redo:
+            variant_digests, variant_written, variant_sources = generate_variants(redo, known, png)
+            digests.update(variant_digests)
+            written.update(variant_written)
+    if stages["contact sheet"] != state["stages"]["contact sheet"]:
+        state["bands"].clear()
+    sheet_digest = generate_contact_sheet(
+        all_sprites, manifest.get("contact_sheet"), bands=state["bands"]
+    )
+    if args.preview and (changed or stages["previews"] != state["stages"]["previews"]):
+        generate_previews(all_sprites, args.preview, args.preview_scale, args.preview_fps)
+    if args.atlas and changed:
+        written.update(generate_atlases(
+            all_sprites, args.atlas, args.atlas_padding, args.atlas_pot, False, png, aliases, trims
+        ))
+    if args.wire and changed:
+        wire_scenes(aliases, trims)
+        remove_stale_aliases(aliases)
+    if args.collision and changed:
+        wire_collision_shapes(all_sprites)
+    if args.import_sidecars and written:
+        write_import_sidecars()
+
+    stale = tuple(f"{entity}/" for entity in changed) + tuple(f"{d}/" for d in variant_sources)
+    sources.update(variant_sources)
+    frames = {name: entry for name, entry in frames.items() if not name.startswith(stale)}
+    frames.update(
+        (name, {"pixels": digest, "source": sources[name.split("/")[0]]})
+        for name, digest in digests.items()
+    )
+    frames = {name: entry for name, entry in frames.items() if name not in aliases}
+    save_manifest({"png": png, "contact_sheet": sheet_digest, "frames": frames})
+
+    state.update(
+        sprites=all_sprites, aliases=aliases, stages=stages,
+        sources={entity: sources[entity] for entity in ENTITIES},
+        variants={entity: repr(VARIANTS.get(entity)) for entity in ENTITIES},
+    )
+    return changed, written
+
+
+def source_blocks(source: str) -> list:
+    """Split module source into top-level statements: [(first line index, text)]."""
+    lines = source.splitlines(keepends=True)
+    blocks = []
+    start = 0
+    in_string = decorated = False
+    for i, line in enumerate(lines):
+        top = (not in_string and line[:1] not in ("", " ", "\t", "\n", "#", ")", "]", "}")
+               and not line.startswith(("else", "elif", "except", "finally")))
+        if top and i > start and not decorated:
+            blocks.append((start, "".join(lines[start:i])))
+            start = i
+        if top:
+            decorated = line.startswith("@")
+        if line.count('"""') % 2:
+            in_string = not in_string
+    blocks.append((start, "".join(lines[start:])))
+    return blocks
+
+
+def shift_lines(code: types.CodeType, delta: int) -> types.CodeType:
+    """`code` (and nested code) moved `delta` lines down — line tables are relative."""
+    consts = tuple(shift_lines(c, delta) if inspect.iscode(c) else c for c in code.co_consts)
+    return code.replace(co_firstlineno=code.co_firstlineno + delta, co_consts=consts)
+
+
+def load_fresh(path: Path, compiled: dict = None) -> types.ModuleType:
+    """
+    Execute the generator source at `path` into a new module object. With a
+    `compiled` cache ({statement text: (first line, code)}), only top-level
+    statements that changed are compiled again; moved ones are shifted.
+    """
+    module = types.ModuleType("generate_sprites_watch")
+    module.__file__ = str(path)
+    sys.modules[module.__name__] = module
+    source = path.read_text()
+    if compiled is None:
+        exec(compile(source, str(path), "exec"), module.__dict__)
+        return module
+    codes = []
+    for start, text in source_blocks(source):
+        cached = compiled.get(text)
+        if cached is None:
+            code = compile("\n" * start + text, str(path), "exec")
+        else:
+            code = cached[1] if cached[0] == start else shift_lines(cached[1], start - cached[0])
+        compiled[text] = (start, code)
+        codes.append(code)
+    for code in codes:
+        exec(code, module.__dict__)
+    return module
+
+
+def watch(argv: list):
+    """Run once with `argv` (minus --watch), then rebuild on every save until Ctrl+C."""
+    argv = [arg for arg in argv if arg != "--watch"]
+    code = main(argv)
+    if code:
+        return code
+    path = Path(__file__).resolve()
+    watched = [path, SPEC_PATH]
+    mtimes = [p.stat().st_mtime_ns for p in watched]
+    # Baseline from a statement-by-statement compile too: compiling the whole
+    # module emits slightly different bytecode for imported names (np.empty).
+    compiled = {}
+    gen = load_fresh(path, compiled)
+    state = gen.watch_state(gen.parse_args(argv))
+    print(f"👀 Watching {path.name} and {SPEC_PATH.name} — save to regenerate (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            if [p.stat().st_mtime_ns for p in watched] == mtimes:
+                continue
+            mtimes = [p.stat().st_mtime_ns for p in watched]
+            start = time.perf_counter()
+            try:
+                gen = load_fresh(path, compiled)
+                changed, written = gen.rebuild(state, gen.parse_args(argv))
+            except Exception as exc:  # a half-typed edit: report and wait for the next save
+                print(f"  ❌ {type(exc).__name__}: {exc}")
+                continue
+            print(f"  ⚡ {', '.join(changed) or 'no entity'} re-rendered, {len(written)} written "
+                  f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\n  👋 Stopped watching.")
 
 
 # ─── Main ──────────────────────────────────────────────────────────
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Procedural sprite generator for Nick's Platformer")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="render frames across N worker processes (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help=f"ignore {MANIFEST_PATH} and rewrite every PNG",
+    )
+    parser.add_argument(
+        "--only", metavar="ENTITY[:ANIM],...",
+        help="render only these entities / animations (e.g. player:run,coin); the tileset "
+             "(unless every tile is selected), contact sheet, previews, atlases, "
+             "scene wiring and collision shapes are left as they are",
+    )
+    parser.add_argument(
+        "--dedupe", action="store_true",
+        help="write pixel-identical animation frames once and record the duplicates "
+             f"in {ALIASES_PATH} (alias → canonical frame) for scene wiring",
+    )
+    parser.add_argument(
+        "--trim", action=argparse.BooleanOptionalAction,
+        help="save animation frames cropped to their alpha bounding box, with offsets in "
+             f"{TRIM_PATH}; --wire and --atlas place them where the whole frames were. "
+             "Stays on for later runs until --no-trim",
+    )
+    parser.add_argument(
+        "--variants", action="store_true",
+        help="also write the palette-swap skins in VARIANTS to "
+             f"{OUT_DIR}/{{entity}}_{{variant}}/ (one palette-index render per entity)",
+    )
+    parser.add_argument(
+        "--tile-variants", type=int, default=0, metavar="N",
+        help="add N seeded variants of every tile (re-rolled speckles, tufts and knots) "
+             f"to {TILE_ATLAS_PATH} and {TILESET_PATH}, after the base tiles",
+    )
+    parser.add_argument(
+        "--tile-seed", type=int, default=TILE_VARIANT_SEED, metavar="S",
+        help=f"seed for --tile-variants (default: {TILE_VARIANT_SEED})",
+    )
+    parser.add_argument(
+        "--wire", action="store_true",
+        help=f"rewrite the SpriteFrames in {SCENES_DIR}/*.tscn to match the generated "
+             "frames (and --dedupe aliases), keeping UIDs and node structure",
+    )
+    parser.add_argument(
+        "--collision", action="store_true",
+        help="give the scenes of entities with a 'collision' animation (slime, coin) a convex "
+             "collision polygon traced from its frames, replacing their hand-made shape",
+    )
+    parser.add_argument(
+        "--preview", nargs="?", const="gif", choices=list(PREVIEW_FORMATS),
+        help=f"also write an animated preview per animation plus a combined one to "
+             f"{PREVIEW_DIR}/, at the speeds the scenes' SpriteFrames play them (default: gif)",
+    )
+    parser.add_argument(
+        "--preview-scale", type=int, default=SHEET_SCALE, metavar="N",
+        help=f"preview zoom (default: {SHEET_SCALE})",
+    )
+    parser.add_argument(
+        "--preview-fps", type=float, metavar="FPS",
+        help="play every preview at this speed instead of the scenes' speeds",
+    )
+    parser.add_argument(
+        "--scales", metavar="N,...",
+        help=f"also write every frame upscaled N× (nearest-neighbor) to {OUT_DIR}_{{N}}x/ "
+             "for high-DPI builds, e.g. 2,4",
+    )
+    parser.add_argument(
+        "--mips", action="store_true",
+        help=f"also write each frame's mip chain (alpha-weighted 2×2 averages) to "
+             f"{OUT_DIR}_mip{{level}}/, down to 1 px",
+    )
+    parser.add_argument(
+        "--atlas", choices=["entity", "all"],
+        help=f"also pack frames into sprite-sheet atlases in {ATLAS_DIR}/ "
+             "(one per entity, or one for all entities) with JSON region sidecars",
+    )
+    parser.add_argument(
+        "--atlas-padding", type=int, default=1, metavar="PX",
+        help="transparent pixels between atlas frames and around the border (default: 1)",
+    )
+    parser.add_argument(
+        "--atlas-pot", action="store_true",
+        help="round atlas dimensions up to powers of two",
+    )
+    parser.add_argument(
+        "--png", choices=["rgba", "indexed"], default="rgba",
+        help="PNG color mode: 32-bit RGBA (default) or palette-indexed from PAL "
+             "with tRNS transparency (RGBA fallback above 256 colors)",
+    )
+    parser.add_argument(
+        "--png-level", type=int, choices=range(10), metavar="0-9",
+        help="zlib compression level (default: Pillow's)",
+    )
+    parser.add_argument(
+        "--png-strategy", choices=list(ZLIB_STRATEGIES),
+        help="zlib compression strategy (default: Pillow's)",
+    )
+    parser.add_argument(
+        "--import-sidecars", action="store_true",
+        help="also write Godot .import sidecars (lossless, no mipmaps, UIDs from content hashes) "
+             "for every sprite PNG and list the files the next import will re-import",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="after the run, keep watching this file and regenerate on save — in-process, "
+             "re-rendering only entities whose drawing code or palette entries changed",
+    )
+    parser.add_argument(
+        "--check", action="store_true",
+        help=f"render every frame in memory and compare its pixels with {GOLDEN_PATH}; "
+             f"differences get diff images in {CHECK_DIR}/ and exit code 1. Writes no sprites",
+    )
+    parser.add_argument(
+        "--update-golden", action="store_true",
+        help=f"record the current frames' pixel hashes in {GOLDEN_PATH} (writes no sprites)",
+    )
+    parser.add_argument(
+        "--report", action="store_true",
+        help=f"print on-disk bytes, decoded RGBA memory and request count per entity and per "
+             f"scene, reading only PNG headers; exit code 1 if over a budget in {BUDGET_PATH}. "
+             f"Writes no sprites",
+    )
+    parser.add_argument(
+        "--budget", action="append", default=[], metavar="KIND[:NAME].METRIC=N",
+        help=f"override a --report budget, e.g. scene.requests=64 or entity:player.bytes=8192 "
+             f"(METRIC: {', '.join(BUDGET_METRICS)}; repeatable)",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const=True, metavar="TRACE.json",
+        help="print per-stage wall/CPU time, peak memory and primitive call counts; "
+             "with a path, also write a Chrome trace (JSON) with the summary embedded",
+    )
+    args = parser.parse_args(argv)
+    try:
+        args.budget = [parse_budget(text) for text in args.budget]
+    except ValueError as exc:
+        parser.error(f"--budget: {exc}")
+    if args.tile_variants < 0:
+        parser.error("--tile-variants must be 0 or more")
+    if args.scales is not None:
+        try:
+            args.scales = parse_scales(args.scales)
+        except ValueError as exc:
+            parser.error(f"--scales: {exc}")
+    if args.only is not None:
+        if args.watch:
+            parser.error("--only can't be combined with --watch")
+        try:
+            args.only = parse_selectors(args.only)
+        except ValueError as exc:
+            parser.error(f"--only: {exc}")
+    return args
+
+
+def png_options(args: argparse.Namespace) -> dict:
+    """
+    Frame output options from the --png* flags (encode_png settings) and
+    --trim; {} = whole frames with Pillow defaults.
+    """
+    return {
+        key: value for key, value in [
+            ("indexed", args.png == "indexed"),
+            ("level", args.png_level),
+            ("strategy", args.png_strategy),
+            ("trim", args.trim),
+        ] if value
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.check or args.update_golden:
+        return check_golden(update=args.update_golden)
+    if args.report:
+        return asset_report(args.budget)
+    if args.watch:
+        return watch(sys.argv[1:] if argv is None else list(argv))
+    workers = args.jobs or os.cpu_count() or 1
+    if args.profile:
+        enable_profiling()
+    run_start, run_cpu_start = time.perf_counter(), time.process_time()
+
     print("🎨 Generating sprites for Nick's Platformer...")
     print(f"   Output: {OUT_DIR}/")
+    if workers > 1:
+        print(f"   Workers: {workers}")
     print()
 
-    all_sprites = {}
+    png = png_options(args)
+    selection = args.only
+    entities = select_entities(selection)
+    if selection is not None:
+        print("   Only: " + ", ".join(
+            entity if selection[entity] is None else ", ".join(f"{entity}:{a}" for a in spec["anims"])
+            for entity, spec in entities.items()
+        ))
+        print()
+    on_disk = load_manifest()
+    resolve_trim(args)
+    if args.trim and args.mips:
+        print("  ❌ --mips can't be combined with --trim (mip levels can't keep the trim offsets); "
+              "run with --no-trim")
+        return 2
+    manifest = {} if args.force else on_disk
+    # Different encoder settings than last run → every PNG must be re-encoded
+    force = args.force or manifest.get("png", {}) != png
+    known = None if force else {
+        name: entry["pixels"] for name, entry in manifest.get("frames", {}).items()
+    }
+    jobs = frame_jobs(entities)
+    all_sprites, digests, written, aliases = render_all(jobs, workers, known, png, args.dedupe)
     total = 0
 
-    print("  👤 Player (16×32)...")
-    all_sprites["player"] = generate_player()
-    count = sum(len(f) for f in all_sprites["player"].values())
-    total += count
-    print(f"     → {count} frames")
-
-    print("  🟢 Slime (16×16)...")
-    all_sprites["slime"] = generate_slime()
-    count = sum(len(f) for f in all_sprites["slime"].values())
-    total += count
-    print(f"     → {count} frames")
-
-    print("  🪙 Coin (16×16)...")
-    all_sprites["coin"] = generate_coin()
-    count = sum(len(f) for f in all_sprites["coin"].values())
-    total += count
-    print(f"     → {count} frames")
-
-    print("  🚩 Goal flag (16×32)...")
-    all_sprites["goal"] = generate_goal()
-    count = sum(len(f) for f in all_sprites["goal"].values())
-    total += count
-    print(f"     → {count} frames")
-
-    print("  🧱 Tiles (16×16)...")
-    tile_imgs = generate_tiles()
-    all_sprites["tiles"] = {name: [img] for name, img in tile_imgs.items()}
-    total += len(tile_imgs)
-    print(f"     → {len(tile_imgs)} tiles")
-
-    print("  ☁️  Background (16×16)...")
-    bg_imgs = generate_bg()
-    all_sprites["bg"] = {name: [img] for name, img in bg_imgs.items()}
-    total += len(bg_imgs)
-    print(f"     → {len(bg_imgs)} elements")
+    for entity, anims in all_sprites.items():
+        spec = ENTITIES[entity]
+        w, h = spec["size"]
+        count = sum(len(f) for f in anims.values())
+        total += count
+        print(f"  {spec['label']} ({w}×{h})...")
+        print(f"     → {count} {spec.get('unit', 'frames')}")
 
     print()
     print(f"  ✅ Total: {total} PNG files in {OUT_DIR}/")
+    print(f"  ♻️  {total - len(aliases) - len(written)} unchanged (skipped), {len(written)} written")
+    if args.dedupe:
+        saved = sum((OUT_DIR / canonical).stat().st_size for canonical in aliases.values())
+        print(f"  🔗 {len(aliases)} duplicate frames aliased → {ALIASES_PATH} "
+              f"({len(aliases)} textures, {saved:,} bytes saved)")
+    trims = trim_frames(all_sprites, aliases) if args.trim else {}
+    if args.trim:
+        full = sum(w * h for trim in trims.values() for w, h in [trim["source_size"]])
+        kept = sum(w * h for trim in trims.values() for w, h in [trim["size"]])
+        print(f"  ✂️  {len(trims)} frames trimmed to their alpha bounds → {TRIM_PATH} "
+              f"({full:,} → {kept:,} px, {1 - kept / full:.1%} of texture area saved)")
+    if selection is not None:
+        # Keep the aliases and trims of frames this run didn't render
+        rendered = {sprite_name(*job) for job in jobs}
+        order = [sprite_name(*job) for job in frame_jobs()]
+        aliases.update(
+            (name, canonical) for name, canonical in load_aliases().items()
+            if name not in rendered
+        )
+        aliases = {name: aliases[name] for name in order if name in aliases}
+        trims.update((name, trim) for name, trim in load_trims().items() if name not in rendered)
+        trims = {name: trims[name] for name in order if name in trims}
+    save_aliases(aliases)
+    save_trims(trims)
+    warn_trim_wiring(args)
     print()
 
-    generate_contact_sheet(all_sprites)
+    variant_sources = {}
+    if args.variants:
+        with stage("variants"):
+            variant_digests, variant_written, variant_sources = generate_variants(
+                {entity: palettes for entity, palettes in VARIANTS.items()
+                 if selection is None or entity in selection},
+                known, png,
+            )
+        digests.update(variant_digests)
+        written.update(variant_written)
+        print(f"  ♻️  {len(variant_digests) - len(variant_written)} unchanged (skipped), "
+              f"{len(variant_written)} written")
+        print()
+
+    if len(all_sprites.get("tiles", ())) == len(TILES):
+        with stage("tileset"):
+            written.update(generate_tileset(
+                all_sprites["tiles"], force, png, args.tile_variants, args.tile_seed
+            ))
+        print()
+
+    if args.scales or args.mips:
+        with stage("resolutions"):
+            written.update(generate_resolutions(
+                all_sprites, args.scales or [], args.mips,
+                {name for name, digest in digests.items() if known and known.get(name) == digest},
+                png,
+            ))
+        print()
+
+    if selection is not None:
+        sheet_digest = on_disk.get("contact_sheet")
+        print("  ⏭️  --only: contact sheet, previews, atlases, scene wiring and collision shapes "
+              "left as they are")
+        print()
+    else:
+        with stage("contact sheet"):
+            sheet_digest = generate_contact_sheet(
+                all_sprites, manifest.get("contact_sheet"), args.force
+            )
+        if args.preview:
+            with stage("previews"):
+                generate_previews(all_sprites, args.preview, args.preview_scale, args.preview_fps)
+    if args.atlas and selection is None:
+        with stage("atlases"):
+            written.update(generate_atlases(
+                all_sprites, args.atlas, args.atlas_padding, args.atlas_pot, force, png, aliases,
+                trims,
+            ))
+    if args.wire and selection is None:
+        with stage("wire scenes"):
+            wire_scenes(aliases, trims)
+            remove_stale_aliases(aliases)
+    if args.collision and selection is None:
+        with stage("collision shapes"):
+            wire_collision_shapes(all_sprites)
+    if args.import_sidecars:
+        with stage("import sidecars"):
+            write_import_sidecars()
+    if encoder_options(png) and written:
+        before = sum(b for b, _ in written.values())
+        after = sum(a for _, a in written.values())
+        print(f"  📦 PNG bytes ({len(written)} files written): {before:,} → {after:,} "
+              f"({(after - before) / before:+.1%} vs default RGBA)")
+
+    with stage("manifest"):
+        sources = {entity: source_hash(entity) for entity in all_sprites}
+        sources.update(variant_sources)
+        frames = {} if selection is None else on_disk.get("frames", {})
+        frames.update(
+            (name, {"pixels": digest, "source": sources[name.split("/")[0]]})
+            for name, digest in digests.items()
+        )
+        # Aliased frames weren't written, so their files may hold older pixels:
+        # leave them out and the next run without --dedupe rewrites them
+        frames = {name: entry for name, entry in frames.items() if name not in aliases}
+        # A partial run with new encoder settings leaves files encoded both ways:
+        # record none, so the next run re-encodes everything
+        save_manifest({
+            "png": png if selection is None or on_disk.get("png", {}) == png else None,
+            "contact_sheet": sheet_digest,
+            "frames": frames,
+        })
     print()
+
+    if args.profile:
+        summary = profile_summary(PROFILER)
+        print_profile(
+            summary, time.perf_counter() - run_start, time.process_time() - run_cpu_start
+        )
+        if isinstance(args.profile, str):
+            write_chrome_trace(Path(args.profile), PROFILER, run_start, summary)
+            print(f"     Trace: {args.profile} (open in chrome://tracing or ui.perfetto.dev)")
+        print()
     print("  Done! Open sprites-review.png to preview all sprites at 4× zoom.")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
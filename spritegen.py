@@ -0,0 +1,88 @@
+"""
+Importable API for the procedural sprite generator
+==================================================
+Single frames on demand for the level editor and scene tools, without a
+batch run — nothing is written to disk:
+
+  import spritegen
+  img = spritegen.render("player", "run", 2, scale=4)   # PIL Image (RGBA)
+  data = spritegen.render_png("coin", "idle", 0)        # PNG bytes
+  spritegen.frames("player:run,coin")                   # [(entity, anim, frame), ...]
+
+Importing this module is cheap: generate-sprites.py — and with it Pillow and
+NumPy — is loaded on first use. Any other attribute (ENTITIES, PAL, TILES,
+render_frame, ...) is looked up on the generator module.
+
+Rendered frames are kept in a bounded LRU cache; call clear_cache() after
+editing PAL or ENTITIES in-process.
+"""
+
+import importlib.util
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+GENERATOR_PATH = Path(__file__).resolve().parent / "generate-sprites.py"
+RENDER_CACHE_SIZE = 256  # frames; the whole game is ~45 at 1×
+
+
+def generator():
+    """The generate-sprites.py module, imported on first call (its hyphen rules out `import`)."""
+    module = sys.modules.get("generate_sprites")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("generate_sprites", GENERATOR_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module  # inspect / pickle look modules up by name
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[spec.name]
+            raise
+    return module
+
+
+def __getattr__(name: str):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    try:
+        return getattr(generator(), name)
+    except AttributeError:
+        raise AttributeError(f"module 'spritegen' has no attribute {name!r}") from None
+
+
+def frames(selectors: str = None) -> list:
+    """(entity, anim, frame) of every frame, or of those matching --only style `selectors`."""
+    gen = generator()
+    selection = None if selectors is None else gen.parse_selectors(selectors)
+    return gen.frame_jobs(gen.select_entities(selection))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render(entity: str, anim: str, frame: int, scale: int = 1):
+    """
+    One frame as a PIL Image, upscaled `scale`× with nearest-neighbor.
+    Cached: the returned Image is shared, so copy() it before drawing on it.
+    Raises ValueError for an unknown entity / animation or out-of-range frame.
+    """
+    gen = generator()
+    gen.parse_selectors(f"{entity}:{anim}")  # validates both names
+    frame_count = gen.ENTITIES[entity]["anims"][anim]
+    if not 0 <= frame < frame_count:
+        raise ValueError(f"{entity}:{anim} has {frame_count} frames, not frame {frame}")
+    if scale < 1:
+        raise ValueError(f"scale must be at least 1, not {scale}")
+    if scale > 1:
+        return gen.upscale(render(entity, anim, frame), scale)
+    return gen.render_frame(entity, anim, frame)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_png(entity: str, anim: str, frame: int, scale: int = 1) -> bytes:
+    """render() encoded as PNG bytes, as the generator would write it with default settings."""
+    return generator().encode_png(render(entity, anim, frame, scale))
+
+
+def clear_cache():
+    """Drop cached frames — after editing PAL or ENTITIES in-process."""
+    render.cache_clear()
+    render_png.cache_clear()
@@ -0,0 +1,74 @@
+"""Collision polygons traced from alpha masks, and their scene wiring."""
+
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import spritegen  # noqa: E402
+
+
+def mask(*rows):
+    return np.array([[c == "#" for c in row] for row in rows])
+
+
+def test_trace_contour_of_a_rectangle():
+    gen = spritegen.generator()
+    assert gen.trace_contour(mask("###", "###")) == [(0, 0), (3, 0), (3, 2), (0, 2)]
+
+
+def test_trace_contour_of_an_l_shape_is_clockwise_from_the_top_left():
+    gen = spritegen.generator()
+    points = gen.trace_contour(mask("#.", "##"))
+    assert points == [(0, 0), (1, 0), (1, 1), (2, 1), (2, 2), (0, 2)]
+    assert gen.polygon_area(points) == 3
+
+
+def test_trace_contour_keeps_the_largest_shape():
+    gen = spritegen.generator()
+    assert gen.trace_contour(mask("#...", "..##", "..##")) == [(2, 1), (4, 1), (4, 3), (2, 3)]
+    assert gen.trace_contour(mask("...", "...")) == []
+
+
+def test_simplify_respects_the_vertex_budget():
+    gen = spritegen.generator()
+    points = gen.trace_contour(gen.ellipse_mask(13, 11))
+    assert len(points) > 8
+    for budget in (8, 6, 4, 3, 1):
+        simplified = gen.simplify(points, budget)
+        assert len(simplified) == max(budget, 3)
+        assert set(simplified) <= set(points)
+        assert simplified[0] == min(simplified, key=lambda p: (p[1], p[0]))
+    assert gen.simplify(points[:4], 8) == points[:4]
+
+
+def test_alpha_polygon_is_centered_on_the_frame():
+    gen = spritegen.generator()
+    frame = gen.Image.new("RGBA", (8, 4), (0, 0, 0, 0))
+    frame.paste((255, 0, 0, 255), (2, 1, 6, 3))
+    frame.paste((0, 0, 0, 40), (0, 3, 8, 4))  # below COLLISION_ALPHA, like the slime's shadow
+    assert gen.alpha_polygon([frame], 8) == (-2, -1, 2, -1, 2, 1, -2, 1)
+
+
+def test_wiring_collision_twice_leaves_the_scenes_unchanged(tmp_path, monkeypatch, capsys):
+    gen = spritegen.generator()
+    shutil.copytree(ROOT / gen.SCENES_DIR, tmp_path / gen.SCENES_DIR)
+    monkeypatch.chdir(tmp_path)
+    all_sprites = {
+        entity: {spec["collision"]: [
+            gen.render_frame(entity, spec["collision"], f)
+            for f in range(spec["anims"][spec["collision"]])
+        ]}
+        for entity, spec in gen.ENTITIES.items() if "collision" in spec
+    }
+
+    rewritten = gen.wire_collision_shapes(all_sprites)
+    assert sorted(path.stem for path in rewritten) == ["coin", "slime"]
+    wired = {path: path.read_text() for path in gen.SCENES_DIR.glob("*.tscn")}
+    assert 'shape = SubResource("ConvexPolygonShape2D_slime")' in wired[gen.SCENES_DIR / "slime.tscn"]
+
+    assert gen.wire_collision_shapes(all_sprites) == []
+    assert {path: path.read_text() for path in gen.SCENES_DIR.glob("*.tscn")} == wired
@@ -0,0 +1,27 @@
+"""A --dedupe run must not leave stale alias frames that later runs skip."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import spritegen  # noqa: E402
+
+
+def test_plain_run_after_dedupe_rewrites_alias_frames(tmp_path, monkeypatch, capsys):
+    gen = spritegen.generator()
+    monkeypatch.chdir(tmp_path)
+    gen.main([])
+
+    monkeypatch.setitem(gen.PAL, "gold", (200, 120, 20))
+    gen.main(["--dedupe"])
+    aliases = gen.load_aliases()
+    assert "coin/idle_5.png" in aliases
+    gen.main([])
+
+    for entity, anim, frame in gen.frame_jobs():
+        name = gen.sprite_name(entity, anim, frame)
+        with gen.Image.open(gen.OUT_DIR / name) as img:
+            on_disk = np.asarray(img.convert("RGBA"))
+        assert (on_disk == np.asarray(gen.render_frame(entity, anim, frame))).all(), name
@@ -0,0 +1,26 @@
+"""The committed sprites-golden.json must match what the generator draws."""
+
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import spritegen  # noqa: E402
+
+
+def test_every_frame_matches_the_golden_hashes(tmp_path, monkeypatch, capsys):
+    gen = spritegen.generator()
+    shutil.copy(ROOT / gen.GOLDEN_PATH, tmp_path)
+    monkeypatch.chdir(tmp_path)
+    assert gen.check_golden() == 0
+
+
+def test_a_palette_change_fails_with_diff_images(tmp_path, monkeypatch, capsys):
+    gen = spritegen.generator()
+    shutil.copy(ROOT / gen.GOLDEN_PATH, tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(gen.PAL, "gold", (200, 120, 20))
+    assert gen.check_golden() == 1
+    assert (gen.CHECK_DIR / "coin" / "idle_0.png").exists()
+    assert not (gen.CHECK_DIR / "player" / "idle_0.png").exists()
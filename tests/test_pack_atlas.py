@@ -0,0 +1,84 @@
+"""Atlas packing: frames never overlap, stay in bounds and fill the sheet well."""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import spritegen  # noqa: E402
+
+
+def random_sizes(seed, count=60, largest=20):
+    rng = random.Random(seed)
+    return [(rng.randint(1, largest), rng.randint(1, largest)) for _ in range(count)]
+
+
+def entity_sizes(gen, entity):
+    spec = gen.ENTITIES[entity]
+    return [spec["size"]] * sum(spec["anims"].values())
+
+
+def assert_disjoint(rects):
+    for i, (x0, y0, w0, h0) in enumerate(rects):
+        for x1, y1, w1, h1 in rects[i + 1:]:
+            assert x0 + w0 <= x1 or x1 + w1 <= x0 or y0 + h0 <= y1 or y1 + h1 <= y0, \
+                ((x0, y0, w0, h0), (x1, y1, w1, h1))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pack_rects_places_every_rect_inside_the_bin_without_overlap(seed):
+    gen = spritegen.generator()
+    sizes = random_sizes(seed, count=40, largest=9)
+    placed = gen.pack_rects(sizes, 48, 48)
+    assert placed is not None and len(placed) == len(sizes)
+    rects = [(x, y, w, h) for (x, y), (w, h) in zip(placed, sizes)]
+    assert all(x >= 0 and y >= 0 and x + w <= 48 and y + h <= 48 for x, y, w, h in rects)
+    assert_disjoint(rects)
+
+
+def test_pack_rects_reports_what_does_not_fit():
+    gen = spritegen.generator()
+    assert gen.pack_rects([(8, 8)] * 5, 16, 16) is None
+    assert gen.pack_rects([(17, 1)], 16, 16) is None
+    assert gen.pack_rects([(8, 8)] * 4, 16, 16) is not None
+
+
+@pytest.mark.parametrize("padding", [0, 1, 2])
+@pytest.mark.parametrize("pot", [False, True])
+def test_pack_atlas_keeps_frames_padded_apart_and_in_bounds(padding, pot):
+    gen = spritegen.generator()
+    sizes = random_sizes(padding)
+    (width, height), placed = gen.pack_atlas(sizes, padding, pot)
+    padded = [(x - padding, y - padding, w + padding, h + padding)
+              for (x, y), (w, h) in zip(placed, sizes)]
+    assert all(x >= 0 and y >= 0 and x + w + padding <= width and y + h + padding <= height
+               for x, y, w, h in padded)
+    assert_disjoint(padded)
+
+
+@pytest.mark.parametrize("entity", ["player", "slime", "coin", "goal", "bg"])
+def test_pack_atlas_pot_sizes_are_powers_of_two(entity):
+    gen = spritegen.generator()
+    sizes = entity_sizes(gen, entity)
+    (width, height), _ = gen.pack_atlas(sizes, pot=True)
+    assert width & (width - 1) == 0 and height & (height - 1) == 0
+    (tight_w, tight_h), _ = gen.pack_atlas(sizes)
+    assert width * height <= 4 * tight_w * tight_h
+
+
+@pytest.mark.parametrize("entity", ["player", "slime", "coin", "goal", "bg"])
+def test_pack_atlas_fills_most_of_the_sheet(entity):
+    gen = spritegen.generator()
+    sizes = entity_sizes(gen, entity)
+    (width, height), _ = gen.pack_atlas(sizes)
+    assert sum(w * h for w, h in sizes) / (width * height) >= 0.8
+    assert max(width, height) <= 2 * min(width, height) + max(max(size) for size in sizes)
+
+
+def test_pack_atlas_fills_mixed_sizes_well():
+    gen = spritegen.generator()
+    sizes = random_sizes(1)
+    (width, height), _ = gen.pack_atlas(sizes)
+    assert sum(w * h for w, h in sizes) / (width * height) >= 0.7
@@ -0,0 +1,59 @@
+"""Scene wiring is idempotent and --dedupe / --trim wiring undoes cleanly."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import spritegen  # noqa: E402
+
+SCENES = sorted((ROOT / "scenes").glob("*.tscn"))
+
+
+@pytest.fixture(scope="module")
+def wiring():
+    """{mode: wire_scene keyword arguments} for every way --wire can run."""
+    gen = spritegen.generator()
+    jobs = gen.frame_jobs()
+    frames = [gen.render_frame(*job) for job in jobs]
+    all_sprites = {}
+    for (entity, anim, _), img in zip(jobs, frames):
+        all_sprites.setdefault(entity, {}).setdefault(anim, []).append(img)
+    aliases = gen.find_aliases(jobs, [gen.pixel_hash(img) for img in frames])
+    trims = gen.trim_frames(all_sprites, aliases)
+    return {
+        "plain": {},
+        "dedupe": {"aliases": aliases},
+        "trim": {"trims": trims},
+        "dedupe+trim": {"aliases": aliases, "trims": trims},
+    }
+
+
+@pytest.mark.parametrize("mode", ["plain", "dedupe", "trim", "dedupe+trim"])
+@pytest.mark.parametrize("scene", SCENES, ids=lambda path: path.stem)
+def test_wiring_twice_changes_nothing(scene, mode, wiring):
+    gen = spritegen.generator()
+    text, _ = gen.wire_scene(scene.read_text(), **wiring[mode])
+    assert gen.wire_scene(text, **wiring[mode]) == (text, [])
+
+
+@pytest.mark.parametrize("mode", ["dedupe", "trim", "dedupe+trim"])
+@pytest.mark.parametrize("scene", SCENES, ids=lambda path: path.stem)
+def test_plain_wiring_restores_the_committed_scene(scene, mode, wiring):
+    gen = spritegen.generator()
+    committed = scene.read_text()
+    assert gen.wire_scene(committed) == (committed, [])
+    text, _ = gen.wire_scene(committed, **wiring[mode])
+    assert gen.wire_scene(text)[0] == committed
+
+
+def test_dedupe_and_trim_wiring_rewrite_the_animated_scenes(wiring):
+    gen = spritegen.generator()
+    player = ROOT / "scenes" / "player.tscn"
+    text = player.read_text()
+    deduped, changed = gen.wire_scene(text, **wiring["dedupe"])
+    assert changed and deduped != text
+    trimmed, _ = gen.wire_scene(text, **wiring["trim"])
+    assert '[sub_resource type="AtlasTexture" id="AtlasTexture_' in trimmed